@@ -0,0 +1,262 @@
+"""
+Índice columnar del dataset construido en una sola pasada de I/O.
+
+Cada imagen se lee una vez (tamaño en disco, dimensiones desde la cabecera,
+integridad y huella de los bytes, ver ``image_probe``, y hash perceptual, ver
+``near_duplicates``) y cada label una vez.
+Con una ``ValidationCache`` solo se leen los ficheros nuevos o modificados.
+El resultado son arrays NumPy que comparten todos los analizadores de
+``YOLODataValidator``:
+
+- por imagen: ``width``, ``height``, ``channels``, ``nbytes``, ``status``,
+  ``image_class`` (clasificación), ``image_label``, ``digest`` y
+  ``image_hash``;
+- por caja: ``boxes`` con columnas ``(file, cls, cx, cy, w, h)`` ordenadas
+  por fichero de label, con ``box_offsets`` para cortar las de cada fichero
+  (ver ``label_parser``) y ``malformed`` con las líneas que no se entienden.
+
+En detección (existe la carpeta de labels) las imágenes son los ficheros de
+``image_folder``; en clasificación, los de cada subcarpeta de clase.
+"""
+
+import hashlib
+import os
+from functools import partial
+
+import numpy as np
+
+from image_probe import FULL_DECODE, STATUS_CORRUPT, STATUS_DAMAGED, inspect_bytes
+from label_parser import load_labels
+from near_duplicates import NEAR_DUP_HASH, hash_bytes
+from parallel import map_chunks
+from validation_cache import cached
+
+IMAGE_EXTENSIONS = (".jpg", ".png")
+# Columnas de ``boxes``
+FILE, CLS, CX, CY, W, H = range(6)
+# Arrays por imagen, en el orden de ``scan_image``
+IMAGE_COLUMNS = [
+    ("width", np.int32),
+    ("height", np.int32),
+    ("channels", np.int8),
+    ("nbytes", np.int64),
+    ("status", np.uint8),
+    ("digest", "S16"),
+    ("image_hash", np.uint64),
+]
+
+
+def list_images(image_folder, classification):
+    """``(rutas, clase_por_imagen, nombres_de_clase)`` en orden estable."""
+    paths, classes, class_names = [], [], []
+    if classification:
+        class_names = sorted(
+            d
+            for d in os.listdir(image_folder)
+            if os.path.isdir(os.path.join(image_folder, d))
+        )
+        for class_id, name in enumerate(class_names):
+            folder = os.path.join(image_folder, name)
+            for f in sorted(os.listdir(folder)):
+                if f.endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(folder, f))
+                    classes.append(class_id)
+    else:
+        for f in sorted(os.listdir(image_folder)):
+            if f.endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(image_folder, f))
+                classes.append(-1)
+    return paths, classes, class_names
+
+
+def scan_image(path, full_decode=FULL_DECODE, hash_kind=None):
+    """Una lectura por imagen, en el orden de ``IMAGE_COLUMNS``.
+
+    El hash perceptual sale de los mismos bytes; sin ``hash_kind``, o si no se
+    puede decodificar, es None.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return 0, 0, 0, 0, STATUS_CORRUPT, b"", None
+    width, height, channels, status = inspect_bytes(data, full_decode)
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    image_hash = None
+    if hash_kind and status != STATUS_CORRUPT:
+        image_hash = hash_bytes(data, hash_kind)
+    return width, height, channels, len(data), status, digest, image_hash
+
+
+def scan_chunk(paths, full_decode=FULL_DECODE, hash_kind=None):
+    return [scan_image(path, full_decode, hash_kind) for path in paths]
+
+
+def scan_images(paths, full_decode=FULL_DECODE, cache=None, hash_kind=None):
+    """``scan_image`` de cada ruta, en paralelo y reutilizando la caché."""
+
+    def compute(paths):
+        chunks = map_chunks(
+            partial(scan_chunk, full_decode=full_decode, hash_kind=hash_kind), paths
+        )
+        return [row for chunk in chunks for row in chunk]
+
+    # Un escaneo con decodificación completa no sirve para el rápido ni al revés,
+    # y uno sin hash (o con otro tipo de hash) tampoco
+    kind = "image:full" if full_decode else "image"
+    if hash_kind:
+        kind += f":{hash_kind}"
+    return cached(cache, kind, paths, compute)
+
+
+class DatasetIndex:
+    def __init__(
+        self,
+        image_folder,
+        label_folder,
+        full_decode=FULL_DECODE,
+        cache=None,
+        streaming=False,
+        hash_kind=NEAR_DUP_HASH,
+    ):
+        self.image_folder = image_folder
+        self.label_folder = label_folder
+        self.full_decode = full_decode
+        self.cache = cache
+        # Tipo de hash perceptual de ``image_hash`` (ahash, dhash o phash)
+        self.hash_kind = hash_kind
+        # En streaming las cajas no se guardan: solo ``box_stats`` (memoria fija)
+        self.streaming = streaming
+        self.box_stats = None
+        self._image_stats = None
+        self.classification = not (
+            isinstance(label_folder, str) and os.path.isdir(label_folder)
+        )
+        self.image_paths, image_class, self.class_names = list_images(
+            image_folder, self.classification
+        )
+        self.image_class = np.array(image_class, dtype=np.int32)
+        self._scan_images()
+        self._scan_labels()
+
+    def _scan_images(self):
+        rows = scan_images(
+            self.image_paths, self.full_decode, self.cache, self.hash_kind
+        )
+        for i, (name, dtype) in enumerate(IMAGE_COLUMNS):
+            column = [row[i] for row in rows]
+            if name == "image_hash":
+                # Sin hash (no se pudo decodificar): fuera de los casi-duplicados
+                self.hashed = np.array([h is not None for h in column], dtype=bool)
+                column = [0 if h is None else h for h in column]
+            setattr(self, name, np.array(column, dtype=dtype))
+
+    def _scan_labels(self):
+        self.label_files = []
+        if not self.classification:
+            self.label_files = sorted(
+                os.path.join(self.label_folder, f)
+                for f in os.listdir(self.label_folder)
+                if f.endswith(".txt")
+            )
+        if self.streaming:
+            from streaming_stats import stream_box_stats
+
+            self.box_stats, self.malformed = stream_box_stats(
+                self.label_files, self.cache.path if self.cache else None
+            )
+            self.boxes = np.zeros((0, 6), dtype=np.float32)
+            self.box_offsets = None
+        else:
+            self.boxes, self.box_offsets, self.malformed = load_labels(
+                self.label_files, self.cache
+            )
+
+        # Imagen <-> label por nombre base ("a.jpg" <-> "a.txt")
+        by_stem = {
+            os.path.splitext(os.path.basename(p))[0]: i
+            for i, p in enumerate(self.label_files)
+        }
+        self.image_label = np.array(
+            [
+                by_stem.get(os.path.splitext(os.path.basename(p))[0], -1)
+                for p in self.image_paths
+            ],
+            dtype=np.int32,
+        )
+
+    @property
+    def ok(self):
+        return self.status != STATUS_CORRUPT
+
+    @property
+    def damaged(self):
+        return self.status == STATUS_DAMAGED
+
+    @property
+    def box_count(self):
+        return self.box_summary().n
+
+    def box_summary(self):
+        """``BoxStats`` de todas las cajas, el mismo resumen en los dos modos.
+
+        En streaming se agrega al leer los labels; si no, aquí, la primera vez.
+        """
+        if self.box_stats is None:
+            from streaming_stats import BoxStats
+
+            self.box_stats = BoxStats()
+            self.box_stats.update(self.boxes)
+        return self.box_stats
+
+    def name(self, i):
+        return os.path.basename(self.image_paths[i])
+
+    def boxes_of(self, label_idx):
+        """Cajas del fichero de label ``label_idx`` (vista, sin copiar)."""
+        if self.streaming:
+            boxes, _, _ = load_labels([self.label_files[label_idx]], self.cache)
+            return boxes
+        return self.boxes[self.box_offsets[label_idx] : self.box_offsets[label_idx + 1]]
+
+    def image_stats(self):
+        """Histogramas y cuantiles de las dimensiones de las imágenes legibles."""
+        if self._image_stats is None:
+            from streaming_stats import stream_image_stats
+
+            self._image_stats = stream_image_stats(
+                self.width[self.ok], self.height[self.ok]
+            )
+        return self._image_stats
+
+    def class_counts(self):
+        if self.classification:
+            counts = np.bincount(self.image_class, minlength=len(self.class_names))
+            return {name: int(n) for name, n in zip(self.class_names, counts)}
+        return self.box_summary().class_counts()
+
+    def exact_duplicates(self):
+        """``[(imagen, primera_imagen_igual)]`` con ficheros idénticos byte a byte."""
+        first, duplicates = {}, []
+        for i in np.flatnonzero(self.ok):
+            digest = self.digest[i]
+            if digest in first:
+                duplicates.append((self.name(i), self.name(first[digest])))
+            else:
+                first[digest] = i
+        return duplicates
+
+    def near_duplicates(self, threshold=None):
+        """``[(imagen, imagen_anterior, distancia)]`` por hash perceptual."""
+        import near_duplicates
+
+        if threshold is None:
+            threshold = near_duplicates.NEAR_DUP_THRESHOLD
+        # Una imagen por grupo de copias exactas: el resto ya lo lista
+        # ``exact_duplicates`` y aquí repetiría cada par a distancia 0
+        candidates = np.flatnonzero(self.ok & self.hashed)
+        _, first = np.unique(self.digest[candidates], return_index=True)
+        valid = np.zeros(len(self.image_paths), dtype=bool)
+        valid[candidates[first]] = True
+        pairs = near_duplicates.find_pairs(self.image_hash, threshold, valid)
+        return [(self.name(j), self.name(i), int(d)) for i, j, d in pairs]
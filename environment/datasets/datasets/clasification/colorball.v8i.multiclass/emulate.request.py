@@ -1,28 +1,306 @@
-import requests
-
-# URL del endpoint
-url = "http://api_user:8000/train/"
-
-# Parámetros de la solicitud
-params = {"user_code": "color_ball"}
-
-# Archivo a enviar
-files = {
-    "file": (
-        "config_train.yaml",
-        open(
-            "/datasets/clasificacion/colorball.v8i.multiclass/config_train.yaml", "rb"
-        ),
-        "application/x-yaml",
+"""
+Generador de carga open-loop para el endpoint de entrenamiento del gateway.
+
+Reenvía uno o varios config YAML a una tasa de llegada fija (constant),
+exponencial (poisson) o a ráfagas (burst), con muchos envíos concurrentes.
+La latencia se mide desde el instante *programado* de cada petición, no desde
+que sale, para corregir la omisión coordinada: si el gateway se atasca, la
+espera acumulada aparece en los percentiles en lugar de esconderse.
+
+Ejemplos:
+    # Una sola petición, como el script original
+    python emulate.request.py
+
+    # 20 req/s Poisson durante 60 s contra el gateway real con token
+    python emulate.request.py --rate 20 --arrival poisson --duration 60 \\
+        --url http://api_user:8000/train/ --token $API_TOKEN config_train.yaml
+
+    # Offline: levantar el stub y atacarlo
+    python emulate.request.py stub --port 8089 --latency 0.05 &
+    python emulate.request.py --url http://localhost:8089/train/ --rate 200 --duration 10
+
+pip install httpx
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_URL = os.getenv("EMULATE_URL", "http://api_user:8000/train/")
+DEFAULT_CONFIG = "/datasets/clasificacion/colorball.v8i.multiclass/config_train.yaml"
+# Parámetros de query si no se pasa ningún --param
+DEFAULT_PARAMS = ["user_code=color_ball"]
+
+
+class LatencyHistogram:
+    """Histograma estilo HDR: buckets log2 con sub-buckets lineales.
+
+    Con 128 sub-buckets el error relativo es < 1 % en todo el rango y la
+    memoria es fija, da igual cuántas muestras se registren.
+    """
+
+    SUB_BUCKETS = 128
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds):
+        us = max(int(seconds * 1e6), 1)
+        # Quedan SUB_BUCKETS valores distintos de ``us >> exponent`` por potencia de 2
+        exponent = max(us.bit_length() - self.SUB_BUCKETS.bit_length(), 0)
+        key = (exponent, us >> exponent)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.max = max(self.max, us)
+
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        target = math.ceil(self.total * p / 100)
+        seen = 0
+        for exponent, sub in sorted(self.counts):
+            seen += self.counts[(exponent, sub)]
+            if seen >= target:
+                # Límite superior del bucket, acotado por el máximo observado
+                return min(((sub + 1) << exponent) - 1, self.max) / 1e6
+        return self.max / 1e6
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max / 1e6,
+        }
+
+
+def positive(kind):
+    """Tipo de argparse que rechaza valores <= 0 (p. ej. ``--rate 0``)."""
+
+    def parse(text):
+        value = kind(text)
+        if value <= 0:
+            raise argparse.ArgumentTypeError(f"must be > 0, got {text}")
+        return value
+
+    return parse
+
+
+def arrival_times(arrival, rate, duration=0.0, count=0, burst_size=10, seed=None):
+    """Instantes programados (segundos desde el inicio) de cada petición.
+
+    Se generan durante ``duration`` segundos o, si es 0, hasta ``count``.
+    """
+    rng = random.Random(seed)
+    times, t = [], 0.0
+    while (t < duration) if duration else (len(times) < count):
+        if arrival == "burst":
+            times.extend([t] * burst_size)
+            t += burst_size / rate
+        else:
+            times.append(t)
+            t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    return times[:count] if count else times
+
+
+def load_configs(patterns):
+    configs = []
+    for pattern in patterns or [DEFAULT_CONFIG]:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, "rb") as f:
+                configs.append((os.path.basename(path), f.read()))
+    return configs
+
+
+def build_headers(args):
+    headers = {"accept": "application/json"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    for header in args.header:
+        key, _, value = header.partition(":")
+        headers[key.strip()] = value.strip()
+    return headers
+
+
+async def run_load(args):
+    import httpx
+
+    configs = load_configs(args.configs)
+    schedule = arrival_times(
+        args.arrival, args.rate, args.duration, args.requests, args.burst_size
+    )
+    params = dict(p.split("=", 1) for p in args.param)
+    auth = tuple(args.basic.split(":", 1)) if args.basic else None
+
+    response_time = LatencyHistogram()  # desde el instante programado
+    service_time = LatencyHistogram()  # desde que la petición sale
+    statuses = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+
+    async with httpx.AsyncClient(
+        headers=build_headers(args), auth=auth, timeout=args.timeout, limits=limits
+    ) as client:
+
+        async def one(i, intended):
+            name, content = configs[i % len(configs)]
+            async with semaphore:
+                sent = time.monotonic()
+                try:
+                    r = await client.post(
+                        args.url,
+                        params=params,
+                        files={args.field: (name, content, "application/x-yaml")},
+                    )
+                    key = str(r.status_code)
+                    if args.requests == 1:
+                        print(r.status_code)
+                        print(r.json())
+                except Exception as e:
+                    key = type(e).__name__
+                done = time.monotonic()
+            statuses[key] = statuses.get(key, 0) + 1
+            response_time.record(done - intended)
+            service_time.record(done - sent)
+
+        start = time.monotonic()
+        tasks = []
+        for i, offset in enumerate(schedule):
+            # Open loop: se lanza a su hora aunque las anteriores no hayan vuelto
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(i, start + offset)))
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - start
+
+    return {
+        "url": args.url,
+        "arrival": args.arrival,
+        "target_rate": args.rate,
+        "achieved_rate": len(schedule) / elapsed if elapsed else 0.0,
+        "requests": len(schedule),
+        "statuses": statuses,
+        "response_time": response_time.summary(),
+        "service_time": service_time.summary(),
+    }
+
+
+def print_report(report):
+    print(
+        f"\n{report['requests']} requests · {report['arrival']} @ "
+        f"{report['target_rate']}/s (achieved {report['achieved_rate']:.1f}/s)"
     )
-}
+    print(f"statuses: {report['statuses']}")
+    print(f"{'':16}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for label in ("response_time", "service_time"):
+        s = report[label]
+        print(
+            f"{label:16}"
+            + "".join(f"{s[k] * 1000:10.1f}" for k in ("p50", "p95", "p99", "max"))
+        )
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    """Gateway falso: acepta ``POST /train`` y responde tras una latencia simulada."""
+
+    latency = 0.05
+    jitter = 0.5
+    error_rate = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency * (1 + random.uniform(-self.jitter, self.jitter)))
+        if not self.path.split("?")[0].rstrip("/").endswith("/train"):
+            return self._reply(404, {"detail": "Not Found"})
+        if random.random() < self.error_rate:
+            return self._reply(503, {"detail": "stub overloaded"})
+        self._reply(
+            200, {"study_id": str(uuid.uuid4()), "mode": "public", "routing": "stub"}
+        )
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-# Encabezados de la solicitud
-headers = {"accept": "application/json"}
+    def log_message(self, *args):
+        pass
+
+
+def run_stub(args):
+    StubGatewayHandler.latency = args.latency
+    StubGatewayHandler.error_rate = args.error_rate
+    # Backlog amplio: con el valor por defecto (5) las ráfagas sufren
+    # reintentos de SYN de 1 s que no son latencia del gateway
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer((args.host, args.port), StubGatewayHandler)
+    print(f"Stub gateway on http://{args.host}:{args.port}/train/")
+    server.serve_forever()
+
+
+def parse_args(argv):
+    if argv and argv[0] == "stub":
+        parser = argparse.ArgumentParser(description="Local stub gateway")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument("--latency", type=float, default=0.05)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        args = parser.parse_args(argv[1:])
+        args.command = "stub"
+        return args
+
+    parser = argparse.ArgumentParser(description="Open-loop load generator")
+    parser.add_argument("configs", nargs="*", help="config YAML files or globs")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--token", default=os.getenv("EMULATE_TOKEN"))
+    parser.add_argument("--basic", help="user:password for basic auth")
+    parser.add_argument("--header", action="append", default=[], help="K: V")
+    parser.add_argument("--param", action="append", help="k=v")
+    parser.add_argument("--field", default="file", help="multipart field name")
+    parser.add_argument(
+        "--arrival", choices=["constant", "poisson", "burst"], default="constant"
+    )
+    parser.add_argument("--rate", type=positive(float), default=1.0, help="requests/s")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=0, help="cap on requests")
+    parser.add_argument("--burst-size", type=positive(int), default=10)
+    parser.add_argument("--concurrency", type=positive(int), default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+    # Con append el default no se sustituye sino que se amplía: se pone aquí
+    if args.param is None:
+        args.param = list(DEFAULT_PARAMS)
+    if not args.duration and not args.requests:
+        args.requests = 1
+    args.command = "run"
+    return args
 
-# Realizar la solicitud POST
-response = requests.post(url, params=params, headers=headers, files=files)
 
-# Imprimir la respuesta
-print(response.status_code)
-print(response.json())
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.command == "stub":
+        run_stub(args)
+    else:
+        report = asyncio.run(run_load(args))
+        print_report(report)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
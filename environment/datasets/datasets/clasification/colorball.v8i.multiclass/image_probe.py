@@ -0,0 +1,140 @@
+"""
+Lectura de metadatos e integridad de imágenes sin decodificarlas.
+
+Ancho, alto y canales salen de la cabecera (SOF en JPEG, IHDR en PNG). La
+integridad se comprueba por niveles: primero la estructura del fichero
+(marcador EOI tras el último SOS del JPEG, CRC de cada chunk PNG hasta IEND) y
+solo si algo no cuadra, o si se pide ``full_decode``, se decodifica con OpenCV.
+Solo una imagen que no se puede decodificar cuenta como corrupta; la que se
+decodifica con la estructura rota queda como aviso (``STATUS_DAMAGED``).
+"""
+
+import os
+import struct
+import zlib
+
+STATUS_OK = 0
+STATUS_CORRUPT = 1
+# Se decodifica, pero la estructura está rota (p. ej. JPEG truncado): es un
+# aviso, la imagen sigue siendo válida
+STATUS_DAMAGED = 2
+
+FULL_DECODE = os.getenv("VALIDATOR_FULL_DECODE", "0") == "1"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Canales por tipo de color PNG (la paleta se expande a RGB)
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+# Marcadores SOF con dimensiones: C0-CF salvo DHT (C4), JPG (C8) y DAC (CC)
+JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def probe_jpeg(data):
+    """``(ancho, alto, canales)`` del primer SOF, o None si no se encuentra."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos, size = 2, len(data)
+    while pos + 4 <= size:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Relleno entre marcadores
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        (length,) = struct.unpack(">H", data[pos + 2 : pos + 4])
+        if marker in JPEG_SOF:
+            if pos + 10 > size:
+                return None
+            height, width, channels = struct.unpack(">HHB", data[pos + 5 : pos + 10])
+            return width, height, channels
+        pos += 2 + length
+    return None
+
+
+def probe_png(data):
+    if data[:8] != PNG_SIGNATURE or data[12:16] != b"IHDR" or len(data) < 26:
+        return None
+    width, height, _, color_type = struct.unpack(">IIBB", data[16:26])
+    return width, height, PNG_CHANNELS.get(color_type, 0)
+
+
+def probe(data):
+    """Dimensiones desde la cabecera: ``(ancho, alto, canales)`` o None."""
+    return probe_jpeg(data) or probe_png(data)
+
+
+def jpeg_complete(data):
+    """Hay un EOI tras el último SOS.
+
+    No se exige que el fichero acabe en EOI: MPF, Motion Photo o metadatos
+    añadidos dejan bytes detrás. Se busca a partir del último SOS para que el
+    EOI de la miniatura EXIF no dé por completo un JPEG truncado.
+    """
+    sos = data.rfind(b"\xff\xda")
+    return sos > 0 and data.find(b"\xff\xd9", sos) != -1
+
+
+def png_complete(data):
+    """Recorre los chunks verificando su CRC hasta llegar a IEND."""
+    pos, size = 8, len(data)
+    while pos + 12 <= size:
+        length, kind = struct.unpack(">I4s", data[pos : pos + 8])
+        end = pos + 8 + length
+        if end + 4 > size:
+            return False
+        (crc,) = struct.unpack(">I", data[end : end + 4])
+        if zlib.crc32(data[pos + 4 : end]) != crc:
+            return False
+        if kind == b"IEND":
+            return True
+        pos = end + 4
+    return False
+
+
+def structure_ok(data):
+    if data[:2] == b"\xff\xd8":
+        return jpeg_complete(data)
+    if data[:8] == PNG_SIGNATURE:
+        return png_complete(data)
+    return False
+
+
+def decode(data):
+    """Decodificación completa: ``(ancho, alto, canales)`` o None."""
+    import cv2
+    import numpy as np
+
+    if not data:
+        # imdecode lanza una excepción con un buffer vacío
+        return None
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    return width, height, img.shape[2] if img.ndim == 3 else 1
+
+
+def inspect_bytes(data, full_decode=FULL_DECODE):
+    """``(ancho, alto, canales, estado)`` de una imagen ya leída."""
+    header = probe(data)
+    suspicious = header is None or not structure_ok(data)
+    if not suspicious and not full_decode:
+        return (*header, STATUS_OK)
+    decoded = decode(data)
+    if decoded is None:
+        return 0, 0, 0, STATUS_CORRUPT
+    return (*decoded, STATUS_DAMAGED if suspicious else STATUS_OK)
+
+
+def inspect_image(path, full_decode=FULL_DECODE):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return 0, 0, 0, STATUS_CORRUPT
+    return inspect_bytes(data, full_decode)
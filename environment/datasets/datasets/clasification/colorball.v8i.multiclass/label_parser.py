@@ -0,0 +1,199 @@
+"""
+Lectura en bloque de labels YOLO a un único array NumPy.
+
+Los ficheros se concatenan en un buffer y se parsean de una vez:
+
+1. Se cuentan los tokens de cada línea sobre los bytes (inicio de token =
+   carácter no blanco precedido de blanco, sumado por línea con ``reduceat``).
+2. Los ficheros cuyas líneas tienen todas 0 o 5 tokens se convierten juntos
+   con ``np.fromstring``; si falla o sale un número de valores distinto del
+   esperado hay algún valor no numérico y se repite fichero a fichero.
+3. Solo los ficheros con líneas raras (tokens de más o de menos, valores no
+   numéricos, clase no entera) pasan por el parser línea a línea, que es el
+   que genera el informe de líneas mal formadas.
+
+Los ficheros se reparten en trozos de ``LABEL_CHUNK_FILES`` entre los procesos
+de ``parallel`` y cada trozo se lee por lotes de ``LABEL_PARSE_BATCH_MB`` para
+acotar la memoria. El resultado son cajas ``float32`` con columnas
+``(file, cls, cx, cy, w, h)``, mucho más compactas que listas de floats.
+"""
+
+import os
+import warnings
+
+import numpy as np
+
+from parallel import map_chunks
+from validation_cache import cached
+
+# Ficheros por trozo del pool de procesos
+LABEL_CHUNK_FILES = int(os.getenv("LABEL_CHUNK_FILES", "4096"))
+PARSE_BATCH_BYTES = int(os.getenv("LABEL_PARSE_BATCH_MB", "64")) * 2**20
+VALUES_PER_LINE = 5
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[list(b" \t\r\n\v\f")] = True
+
+
+def parse_label_file(path):
+    """Parser lento: ``(filas (n, 5), [(nº_línea, texto, motivo)])``."""
+    rows, malformed = [], []
+    with open(path, "r", errors="replace") as f:
+        for lineno, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != VALUES_PER_LINE:
+                reason = f"expected {VALUES_PER_LINE} values, got {len(parts)}"
+            else:
+                try:
+                    values = [float(p) for p in parts]
+                except ValueError:
+                    reason = "non-numeric value"
+                else:
+                    # Clase entera y representable en int64
+                    if values[0].is_integer() and abs(values[0]) < 2**63:
+                        rows.append(values)
+                        continue
+                    reason = "non-integer class"
+            malformed.append((lineno, line.rstrip("\n"), reason))
+    return np.array(rows, dtype=np.float32).reshape(-1, VALUES_PER_LINE), malformed
+
+
+def read_label(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # Cada fichero termina en salto de línea para que no se pegue al siguiente
+    return data if not data or data.endswith(b"\n") else data + b"\n"
+
+
+def tokens_per_line(buffer):
+    """Tokens de cada línea de un buffer en el que toda línea acaba en ``\\n``."""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if not data.size:
+        return np.zeros(0, dtype=np.int64)
+    blank = WHITESPACE[data]
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    newlines = np.flatnonzero(data == ord("\n"))
+    line_starts = np.concatenate(([0], newlines[:-1] + 1))
+    return np.add.reduceat(starts, line_starts, dtype=np.int32)
+
+
+def parse_numbers(contents):
+    """Valores de ``contents`` en float64, o None si alguno no es un número."""
+    text = b"".join(contents).decode("latin-1")
+    try:
+        with warnings.catch_warnings():
+            # NumPy < 2.3 solo avisa y devuelve lo leído hasta el error
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(text, dtype=np.float64, sep=" ")
+    except (ValueError, DeprecationWarning):
+        return None
+
+
+def parse_batch(paths, contents):
+    """``(filas, filas_por_fichero, {fichero: líneas_mal_formadas})`` de un lote."""
+    counts = tokens_per_line(b"".join(contents))
+    lines = np.array([c.count(b"\n") for c in contents], dtype=np.int64)
+    file_of_line = np.repeat(np.arange(len(contents)), lines)
+    bad_file = np.zeros(len(contents), dtype=bool)
+    bad_file[file_of_line[(counts != 0) & (counts != VALUES_PER_LINE)]] = True
+    boxes = np.bincount(
+        file_of_line[counts == VALUES_PER_LINE], minlength=len(contents)
+    )
+
+    good = np.flatnonzero(~bad_file)
+    values = parse_numbers([contents[i] for i in good])
+    if values is None or values.size != boxes[good].sum() * VALUES_PER_LINE:
+        # Algún valor no numérico: se localiza convirtiendo fichero a fichero
+        numeric = []
+        for i in good:
+            file_values = parse_numbers([contents[i]])
+            if (
+                file_values is not None
+                and file_values.size == boxes[i] * VALUES_PER_LINE
+            ):
+                numeric.append(file_values)
+            else:
+                bad_file[i] = True
+        good = np.flatnonzero(~bad_file)
+        values = np.concatenate(numeric) if numeric else np.zeros(0)
+
+    values = values.reshape(-1, VALUES_PER_LINE)
+    file_of_row = np.repeat(good, boxes[good])
+    # Una clase no entera, infinita o fuera de int64 se informa desde el parser
+    # lento, igual que si el fichero hubiera ido directamente por él
+    cls = values[:, 0]
+    with np.errstate(invalid="ignore"):
+        bad_class = ~np.isfinite(cls) | (cls != np.floor(cls)) | (np.abs(cls) >= 2**63)
+    bad_file[file_of_row[bad_class]] = True
+    rows = values.astype(np.float32)
+    keep = ~bad_file[file_of_row]
+    rows, file_of_row = [rows[keep]], [file_of_row[keep]]
+
+    malformed = {}
+    for i in np.flatnonzero(bad_file):
+        file_rows, malformed[int(i)] = parse_label_file(paths[i])
+        rows.append(file_rows)
+        file_of_row.append(np.full(len(file_rows), i))
+    file_of_row = np.concatenate(file_of_row)
+    order = np.argsort(file_of_row, kind="stable")
+    return (
+        np.concatenate(rows)[order],
+        np.bincount(file_of_row, minlength=len(contents)),
+        malformed,
+    )
+
+
+def parse_chunk(paths):
+    """``parse_batch`` sobre un trozo de ficheros, leyendo por lotes de bytes."""
+    rows, counts, malformed = [], [], {}
+    start, contents, size = 0, [], 0
+    for end, path in enumerate(paths, 1):
+        data = read_label(path)
+        contents.append(data)
+        size += len(data)
+        if size >= PARSE_BATCH_BYTES or end == len(paths):
+            batch_rows, batch_counts, batch_malformed = parse_batch(
+                paths[start:end], contents
+            )
+            rows.append(batch_rows)
+            counts.append(batch_counts)
+            malformed.update({start + i: m for i, m in batch_malformed.items()})
+            start, contents, size = end, [], 0
+    if not paths:
+        return np.zeros((0, VALUES_PER_LINE), np.float32), np.zeros(0, np.int64), {}
+    return np.concatenate(rows), np.concatenate(counts), malformed
+
+
+def parse_labels(paths):
+    """``(filas, líneas_mal_formadas)`` de cada fichero, repartido en procesos."""
+    out = []
+    for rows, counts, malformed in map_chunks(
+        parse_chunk, paths, chunksize=LABEL_CHUNK_FILES
+    ):
+        per_file = np.split(rows, np.cumsum(counts)[:-1])
+        out += [(r, malformed.get(i, [])) for i, r in enumerate(per_file)]
+    return out
+
+
+def load_labels(paths, cache=None):
+    """Cajas ``(N, 6)``, offsets por fichero y ``[(ruta, línea, texto, motivo)]``.
+
+    Las cajas del fichero ``i`` son ``boxes[offsets[i]:offsets[i + 1]]``.
+    """
+    paths = list(paths)
+    parsed = cached(cache, "labels", paths, parse_labels)
+    counts = [len(rows) for rows, _ in parsed]
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    boxes = np.empty((offsets[-1], VALUES_PER_LINE + 1), dtype=np.float32)
+    boxes[:, 0] = np.repeat(np.arange(len(paths)), counts)
+    if parsed:
+        boxes[:, 1:] = np.concatenate([rows for rows, _ in parsed])
+    malformed = [
+        (path, lineno, text, reason)
+        for path, (_, lines) in zip(paths, parsed)
+        for lineno, text, reason in lines
+    ]
+    return boxes, offsets, malformed
@@ -0,0 +1,128 @@
+"""
+Detección de casi-duplicados con hashes perceptuales de 64 bits.
+
+Los hashes (aHash, dHash o pHash) salen de una decodificación reducida de los
+bytes que ``dataset_index.scan_image`` ya ha leído: el JPEG se decodifica a
+1/8 directamente desde los coeficientes DCT, así que hashear una imagen de
+12 MP cuesta poco más que leerla y no hace falta una segunda pasada de I/O.
+El hash se guarda como columna del índice y en la caché de validación.
+
+Para encontrar los pares a distancia de Hamming <= ``threshold`` sin comparar
+todos contra todos se usa multi-index hashing: el hash se parte en
+``BLOCKS`` bloques de 16 bits y, por el principio del palomar, dos hashes a
+distancia <= r coinciden en al menos un bloque con distancia <= r // BLOCKS.
+Cada bloque se ordena una vez con una tabla directa de 65536 cubetas y los
+vecinos de cada consulta se leen de la cubeta de su clave (exacta, o con 1-2
+bits del bloque cambiados), procesando las consultas por lotes para que la
+memoria no dependa del tamaño del dataset.
+"""
+
+import os
+from itertools import combinations
+
+import numpy as np
+
+NEAR_DUP_HASH = os.getenv("NEAR_DUP_HASH", "phash")
+NEAR_DUP_THRESHOLD = int(os.getenv("NEAR_DUP_THRESHOLD", "6"))
+BLOCKS = 4
+BLOCK_BITS = 64 // BLOCKS
+BUCKETS = 1 << BLOCK_BITS
+QUERY_BATCH = 8192
+HASH_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+
+def pack_bits(bits):
+    """Matriz booleana de 64 elementos -> entero de 64 bits."""
+    return int(np.bitwise_or.reduce(HASH_BITS[bits.ravel()]))
+
+
+def average_hash(gray):
+    import cv2
+
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return pack_bits(small > small.mean())
+
+
+def difference_hash(gray):
+    import cv2
+
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return pack_bits(small[:, 1:] > small[:, :-1])
+
+
+def perceptual_hash(gray):
+    import cv2
+
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(np.float32(small))[:8, :8]
+    # La componente continua no aporta al umbral de la mediana
+    return pack_bits(low > np.median(low.ravel()[1:]))
+
+
+HASHES = {
+    "ahash": average_hash,
+    "dhash": difference_hash,
+    "phash": perceptual_hash,
+}
+
+
+def hash_bytes(data, kind=NEAR_DUP_HASH):
+    """Hash de una imagen ya leída, o None si no se puede decodificar.
+
+    No vale 0 como marca: todas esas imágenes saldrían a distancia 0 entre sí.
+    """
+    import cv2
+
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    return None if gray is None else HASHES[kind](gray)
+
+
+def popcount(values):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def flip_masks(radius):
+    """Máscaras de 16 bits con como mucho ``radius`` bits a 1."""
+    masks = [0]
+    for r in range(1, radius + 1):
+        masks += [sum(1 << b for b in bits) for bits in combinations(range(16), r)]
+    return np.array(masks, dtype=np.int64)
+
+
+def find_pairs(hashes, threshold=NEAR_DUP_THRESHOLD, valid=None):
+    """Pares ``(i, j, distancia)`` con ``i < j`` y distancia <= ``threshold``."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    ids = np.arange(len(hashes)) if valid is None else np.flatnonzero(valid)
+    masks = flip_masks(threshold // BLOCKS)
+    found = []
+    for block in range(BLOCKS):
+        shift = np.uint64(block * BLOCK_BITS)
+        keys = ((hashes[ids] >> shift) & np.uint64(0xFFFF)).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        # Tabla directa: las posiciones con clave k están en starts[k]:starts[k+1]
+        starts = np.zeros(BUCKETS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=BUCKETS), out=starts[1:])
+        for start in range(0, len(ids), QUERY_BATCH):
+            query = np.arange(start, min(start + QUERY_BATCH, len(ids)))
+            for mask in masks:
+                probe = keys[query] ^ mask
+                lo, hi = starts[probe], starts[probe + 1]
+                counts = hi - lo
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Expande cada rango [lo, hi) a un candidato por fila
+                offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                a = np.repeat(query, counts)
+                b = order[np.arange(total) + offsets]
+                keep = a < b
+                a, b = ids[a[keep]], ids[b[keep]]
+                distance = popcount(hashes[a] ^ hashes[b])
+                keep = distance <= threshold
+                found.append(np.stack([a[keep], b[keep], distance[keep]], axis=1))
+    if not found:
+        return np.zeros((0, 3), dtype=np.int64)
+    # Un mismo par puede aparecer en varios bloques
+    return np.unique(np.concatenate(found).astype(np.int64), axis=0)
@@ -0,0 +1,45 @@
+"""
+Reparto del trabajo por imagen en un pool de procesos.
+
+La lista se corta en trozos de ``VALIDATOR_CHUNK_SIZE`` elementos y cada
+proceso devuelve un resultado compacto por trozo (arrays NumPy, rutas), nunca
+imágenes. Los resultados llegan en el orden de los trozos, así que
+concatenarlos da exactamente lo mismo que el camino secuencial, que es el que
+se usa con un solo worker o un solo trozo.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# 0 = un worker por núcleo
+VALIDATOR_WORKERS = int(os.getenv("VALIDATOR_WORKERS", "0"))
+CHUNK_SIZE = int(os.getenv("VALIDATOR_CHUNK_SIZE", "256"))
+
+
+def worker_count(workers=None):
+    workers = VALIDATOR_WORKERS if workers is None else workers
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def chunked(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def imap_chunks(func, items, workers=None, chunksize=CHUNK_SIZE):
+    """Genera ``func(trozo)`` para cada trozo, en orden y en paralelo si compensa.
+
+    ``func`` tiene que ser una función de módulo (se envía por pickle).
+    """
+    chunks = chunked(list(items), max(1, chunksize))
+    workers = min(worker_count(workers), len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(func, chunks)
+
+
+def map_chunks(func, items, workers=None, chunksize=CHUNK_SIZE):
+    """``[func(trozo) for trozo in trozos]``, ver ``imap_chunks``."""
+    return list(imap_chunks(func, items, workers, chunksize))
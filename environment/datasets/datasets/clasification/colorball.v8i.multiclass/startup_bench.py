@@ -0,0 +1,106 @@
+"""
+Benchmark de arranque en frío de los validadores.
+
+Cada escenario corre en un intérprete nuevo (como un contenedor por subida) y
+mide el tiempo total del proceso y el del propio escenario, además de qué
+librerías pesadas acabaron importadas. Un chequeo que no usa el modelo no
+debería cargar ultralytics, torch, cv2, matplotlib ni fiftyone.
+
+    python startup_bench.py                 # 5 repeticiones por escenario
+    python startup_bench.py --dataset ./ --repeat 10 --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = [
+    "ultralytics",
+    "torch",
+    "cv2",
+    "matplotlib",
+    "seaborn",
+    "pandas",
+    "fiftyone",
+    "fpdf",
+    "PIL",
+]
+
+SCENARIOS = {
+    "import yolo_valid": "import yolo_valid",
+    "import yolo_dataset_validator": "import yolo_dataset_validator",
+    "annotation check": (
+        "from yolo_dataset_validator import YOLODatasetValidator\n"
+        "v = YOLODatasetValidator({dataset!r}, log_file={log!r})\n"
+        "v.check_class_balance()\n"
+        "v.check_annotations()"
+    ),
+}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {here!r})
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def run_scenario(code, repeat):
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = CHILD.format(here=here, code=code, heavy=HEAVY_MODULES)
+    walls, inner, heavy = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        walls.append(time.perf_counter() - start)
+        data = json.loads(out.stdout.strip().splitlines()[-1])
+        inner.append(data["elapsed"])
+        heavy = data["heavy"]
+    return {
+        "process_s": statistics.median(walls),
+        "scenario_s": statistics.median(inner),
+        "heavy_imports": heavy,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validator cold-start benchmark")
+    parser.add_argument("--dataset", default="./")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    log = os.path.join(tempfile.mkdtemp(), "startup_bench.log")
+    results = {}
+    for name, code in SCENARIOS.items():
+        code = code.format(dataset=os.path.abspath(args.dataset), log=log)
+        results[name] = run_scenario(code, args.repeat)
+
+    print(f"{'scenario':32}{'process s':>11}{'scenario s':>12}  heavy imports")
+    over_budget = False
+    for name, r in results.items():
+        over_budget |= r["process_s"] > args.budget
+        print(
+            f"{name:32}{r['process_s']:>11.3f}{r['scenario_s']:>12.3f}  "
+            f"{', '.join(r['heavy_imports']) or '-'}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if over_budget:
+        print(f"❌ Cold start over the {args.budget}s budget")
+    sys.exit(1 if over_budget else 0)
@@ -0,0 +1,252 @@
+"""
+Estadísticas en streaming con memoria constante para los analizadores.
+
+En vez de guardar un valor por caja se actualizan, trozo a trozo:
+
+- ``Histogram``: bins fijos (lineales o logarítmicos) más contadores de
+  valores por debajo y por encima del rango;
+- ``Histogram2D``: el ancho vs alto de las cajas;
+- ``KLLSketch``: cuantiles aproximados (Karnin-Lang-Liberty) con unos pocos
+  cientos de valores guardados, sea cual sea el tamaño del dataset.
+
+Todos se fusionan con ``merge``: cada proceso del pool resume su trozo de
+labels y el proceso principal suma los resúmenes según llegan.
+"""
+
+import os
+from functools import partial
+
+import numpy as np
+
+from parallel import imap_chunks
+
+STATS_BINS = int(os.getenv("VALIDATOR_STATS_BINS", "50"))
+KLL_K = int(os.getenv("VALIDATOR_KLL_K", "200"))
+
+
+class Histogram:
+    def __init__(self, edges, log=False):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.log = log
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    @classmethod
+    def linear(cls, lo, hi, bins=STATS_BINS):
+        return cls(np.linspace(lo, hi, bins + 1))
+
+    @classmethod
+    def logarithmic(cls, lo, hi, bins=STATS_BINS):
+        return cls(np.geomspace(lo, hi, bins + 1), log=True)
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        self.counts += np.histogram(values, self.edges)[0]
+        self.under += int((values < self.edges[0]).sum())
+        self.over += int((values > self.edges[-1]).sum())
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+        return self
+
+
+class Histogram2D:
+    def __init__(self, xedges, yedges):
+        self.xedges = np.asarray(xedges, dtype=np.float64)
+        self.yedges = np.asarray(yedges, dtype=np.float64)
+        self.counts = np.zeros((len(xedges) - 1, len(yedges) - 1), dtype=np.int64)
+
+    def update(self, x, y):
+        self.counts += np.histogram2d(x, y, (self.xedges, self.yedges))[0].astype(
+            np.int64
+        )
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+
+class KLLSketch:
+    """Sketch de cuantiles KLL: el nivel ``h`` guarda elementos de peso ``2**h``.
+
+    Cuando un nivel supera su capacidad se ordena y la mitad de sus elementos
+    (los pares o los impares, al azar) sube al siguiente. Las capacidades
+    decrecen un factor 2/3 hacia los niveles bajos, así que el total guardado
+    es O(k) y el error de rango es O(1/k).
+    """
+
+    def __init__(self, k=KLL_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.zeros(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return
+        self.n += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                items = np.sort(items)
+                # Con un número impar de elementos el último se queda en el nivel
+                even = len(items) - len(items) % 2
+                promoted = items[self._rng.integers(2) : even : 2]
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], promoted]
+                )
+                self.levels[level] = items[even:]
+            level += 1
+
+    def quantile(self, q):
+        if not self.n:
+            return float("nan")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(kept), 2**level) for level, kept in enumerate(self.levels)]
+        )
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        rank = q * cumulative[-1]
+        i = min(np.searchsorted(cumulative, rank, "left"), len(items) - 1)
+        return float(np.clip(items[order][i], self.min, self.max))
+
+
+class BoxStats:
+    """Resumen de tamaño fijo de un conjunto de cajas ``(file, cls, cx, cy, w, h)``."""
+
+    def __init__(self):
+        self.n = 0
+        self.classes = np.zeros(0, dtype=np.int64)
+        self.area = Histogram.linear(0, 1)
+        self.aspect = Histogram.logarithmic(1e-2, 1e2)
+        self.cx = Histogram.linear(0, 1)
+        self.cy = Histogram.linear(0, 1)
+        self.width_height = Histogram2D(
+            np.linspace(0, 1, 2 * STATS_BINS + 1), np.linspace(0, 1, 2 * STATS_BINS + 1)
+        )
+        self.area_quantiles = KLLSketch()
+        self.aspect_quantiles = KLLSketch()
+
+    def update(self, boxes):
+        self.n += len(boxes)
+        classes = boxes[:, 1].astype(np.int64)
+        classes = np.bincount(classes[classes >= 0])
+        self._add_classes(classes)
+        w, h = boxes[:, 4], boxes[:, 5]
+        area = w * h
+        aspect = w[h != 0] / h[h != 0]
+        self.area.update(area)
+        self.aspect.update(aspect)
+        self.cx.update(boxes[:, 2])
+        self.cy.update(boxes[:, 3])
+        self.width_height.update(w, h)
+        self.area_quantiles.update(area)
+        self.aspect_quantiles.update(aspect)
+
+    def merge(self, other):
+        self.n += other.n
+        self._add_classes(other.classes)
+        for name in ("area", "aspect", "cx", "cy", "width_height"):
+            getattr(self, name).merge(getattr(other, name))
+        self.area_quantiles.merge(other.area_quantiles)
+        self.aspect_quantiles.merge(other.aspect_quantiles)
+        return self
+
+    def _add_classes(self, counts):
+        if len(counts) > len(self.classes):
+            self.classes = np.pad(self.classes, (0, len(counts) - len(self.classes)))
+        self.classes[: len(counts)] += counts
+
+    def class_counts(self):
+        return {int(c): int(n) for c, n in enumerate(self.classes) if n}
+
+
+class ImageStats:
+    """Resumen de tamaño fijo de las dimensiones de las imágenes."""
+
+    def __init__(self):
+        self.width = Histogram.logarithmic(8, 16384)
+        self.height = Histogram.logarithmic(8, 16384)
+        self.aspect = Histogram.logarithmic(1e-1, 1e1)
+        self.aspect_quantiles = KLLSketch()
+
+    def update(self, width, height):
+        width, height = width.astype(np.float64), height.astype(np.float64)
+        aspect = width[height != 0] / height[height != 0]
+        self.width.update(width)
+        self.height.update(height)
+        self.aspect.update(aspect)
+        self.aspect_quantiles.update(aspect)
+
+    def merge(self, other):
+        for name in ("width", "height", "aspect", "aspect_quantiles"):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+
+def box_stats_chunk(paths, cache_file=None):
+    """``(BoxStats, líneas_mal_formadas)`` de un trozo de labels (en un worker)."""
+    from label_parser import load_labels
+    from validation_cache import ValidationCache
+
+    cache = ValidationCache(cache_file) if cache_file else None
+    boxes, _, malformed = load_labels(paths, cache)
+    stats = BoxStats()
+    stats.update(boxes)
+    return stats, malformed
+
+
+def stream_box_stats(label_files, cache_file=None):
+    """Resume todos los labels trozo a trozo sin tener nunca todas las cajas."""
+    from label_parser import LABEL_CHUNK_FILES
+
+    stats, malformed = BoxStats(), []
+    for chunk_stats, chunk_malformed in imap_chunks(
+        partial(box_stats_chunk, cache_file=cache_file),
+        label_files,
+        chunksize=LABEL_CHUNK_FILES,
+    ):
+        stats.merge(chunk_stats)
+        malformed += chunk_malformed
+    return stats, malformed
+
+
+def stream_image_stats(width, height, chunksize=1 << 16):
+    stats = ImageStats()
+    for start in range(0, len(width), chunksize):
+        stats.update(
+            width[start : start + chunksize], height[start : start + chunksize]
+        )
+    return stats
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del validador se importan planos, como en yolo_valid.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from image_probe import (
+    STATUS_CORRUPT,
+    STATUS_DAMAGED,
+    STATUS_OK,
+    inspect_bytes,
+    inspect_image,
+    probe,
+)
+
+cv2 = pytest.importorskip("cv2")
+
+
+def encode(ext, width=48, height=32, channels=3):
+    rng = np.random.default_rng(0)
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    ok, buffer = cv2.imencode(ext, rng.integers(0, 256, shape, dtype=np.uint8))
+    assert ok
+    return buffer.tobytes()
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png"])
+@pytest.mark.parametrize("channels", [1, 3])
+def test_header_dimensions_match_decode(ext, channels):
+    data = encode(ext, channels=channels)
+    assert probe(data) == (48, 32, channels)
+    assert inspect_bytes(data) == (48, 32, channels, STATUS_OK)
+    assert inspect_bytes(data, full_decode=True) == (48, 32, channels, STATUS_OK)
+
+
+def test_jpeg_with_trailing_data_is_ok():
+    # Como un Motion Photo: otro bloque detrás del EOI
+    data = encode(".jpg") + b"\x00" * 64 + b"trailer"
+    assert inspect_bytes(data) == (48, 32, 3, STATUS_OK)
+
+
+def test_truncated_jpeg_is_damaged_or_corrupt():
+    data = encode(".jpg")
+    _, _, _, status = inspect_bytes(data[: len(data) - 40])
+    assert status in (STATUS_DAMAGED, STATUS_CORRUPT)
+    assert status != STATUS_OK
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image", b"\xff\xd8\xff", b"\x89PNG"])
+def test_junk_is_corrupt(data):
+    assert inspect_bytes(data) == (0, 0, 0, STATUS_CORRUPT)
+
+
+def test_png_crc_failure_falls_back_to_decode():
+    data = bytearray(encode(".png"))
+    # Último byte del CRC de IEND: la estructura falla pero se decodifica
+    data[-1] ^= 0xFF
+    assert inspect_bytes(bytes(data)) == (48, 32, 3, STATUS_DAMAGED)
+
+
+def test_missing_file_is_corrupt(tmp_path):
+    assert inspect_image(str(tmp_path / "missing.jpg")) == (0, 0, 0, STATUS_CORRUPT)
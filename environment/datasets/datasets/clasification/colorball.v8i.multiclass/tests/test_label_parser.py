@@ -0,0 +1,81 @@
+import numpy as np
+
+import label_parser
+from label_parser import load_labels, parse_label_file
+
+TOKENS = ["0", "3", "12", "0.5", "0.25", "1e-3", "inf", "-inf", "nan", "1e20", "1.5"]
+
+
+def random_line(rng):
+    kind = rng.integers(10)
+    if kind == 0:
+        return ""
+    if kind == 1:
+        return " \t "
+    if kind == 2:
+        count = rng.choice([1, 4, 6])
+        return " ".join(rng.choice(TOKENS, count))
+    if kind == 3:
+        values = ["0", "0.5", "0.5", "0.1", "0.1"]
+        values[rng.integers(5)] = rng.choice(["abc", "0.5x", "--1"])
+        return " ".join(values)
+    cls = rng.choice(TOKENS) if kind == 4 else str(rng.integers(5))
+    coords = [f"{v:.6f}" for v in rng.random(4)]
+    return "\t".join([cls] + coords) if kind == 5 else " ".join([cls] + coords)
+
+
+def write_files(tmp_path, rng, count):
+    paths = []
+    for i in range(count):
+        lines = [random_line(rng) for _ in range(rng.integers(0, 8))]
+        text = "\n".join(lines)
+        if lines and rng.random() < 0.5:
+            text += "\r\n" if rng.random() < 0.3 else "\n"
+        path = tmp_path / f"{i}.txt"
+        path.write_text(text, newline="")
+        paths.append(str(path))
+    return paths
+
+
+def assert_matches_slow_path(paths):
+    boxes, offsets, malformed = load_labels(paths)
+    expected_malformed = []
+    for i, path in enumerate(paths):
+        rows, lines = parse_label_file(path)
+        got = boxes[offsets[i] : offsets[i + 1]]
+        assert (got[:, 0] == i).all()
+        np.testing.assert_array_equal(got[:, 1:], rows)
+        expected_malformed += [(path, *line) for line in lines]
+    assert malformed == expected_malformed
+
+
+def test_fast_path_matches_slow_parser(tmp_path):
+    rng = np.random.default_rng(0)
+    assert_matches_slow_path(write_files(tmp_path, rng, 300))
+
+
+def test_parity_holds_across_byte_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(label_parser, "PARSE_BATCH_BYTES", 200)
+    rng = np.random.default_rng(1)
+    assert_matches_slow_path(write_files(tmp_path, rng, 100))
+
+
+def test_clean_files_never_report_malformed_lines(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("0 0.5 0.5 0.1 0.1\n\n2 0.25 0.75 0.2 0.3")
+    boxes, offsets, malformed = load_labels([str(path)])
+    assert malformed == []
+    np.testing.assert_array_equal(offsets, [0, 2])
+    np.testing.assert_allclose(boxes[:, 1], [0, 2])
+
+
+def test_bad_lines_are_reported_with_reason(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("0 0.5 0.5 0.1 0.1\n1.5 0.5 0.5 0.1 0.1\n0 0.5\n0 a 0.5 0.1 0.1\n")
+    boxes, offsets, malformed = load_labels([str(path)])
+    assert len(boxes) == 1
+    assert [(lineno, reason) for _, lineno, _, reason in malformed] == [
+        (2, "non-integer class"),
+        (3, "expected 5 values, got 2"),
+        (4, "non-numeric value"),
+    ]
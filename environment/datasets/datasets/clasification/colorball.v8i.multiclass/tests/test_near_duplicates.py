@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from near_duplicates import find_pairs, popcount
+
+
+def clustered_hashes(rng, clusters=40, per_cluster=5, noise=200):
+    """Hashes aleatorios más grupos de copias con pocos bits cambiados."""
+    hashes = list(rng.integers(0, 2**64, noise, dtype=np.uint64))
+    for center in rng.integers(0, 2**64, clusters, dtype=np.uint64):
+        hashes.append(center)
+        for _ in range(per_cluster - 1):
+            flips = rng.choice(64, rng.integers(0, 12), replace=False)
+            hashes.append(
+                center
+                ^ np.bitwise_or.reduce(
+                    np.uint64(1) << flips.astype(np.uint64), initial=np.uint64(0)
+                )
+            )
+    return np.array(hashes, dtype=np.uint64)
+
+
+def brute_force(hashes, threshold, valid=None):
+    ids = np.arange(len(hashes)) if valid is None else np.flatnonzero(valid)
+    pairs = []
+    for x, i in enumerate(ids):
+        distance = popcount(hashes[i] ^ hashes[ids[x + 1 :]])
+        for j, d in zip(
+            ids[x + 1 :][distance <= threshold], distance[distance <= threshold]
+        ):
+            pairs.append((i, j, d))
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 3)
+
+
+@pytest.mark.parametrize("threshold", [0, 3, 6, 10])
+def test_matches_brute_force(threshold):
+    hashes = clustered_hashes(np.random.default_rng(threshold))
+    expected = brute_force(hashes, threshold)
+    assert len(expected)
+    np.testing.assert_array_equal(find_pairs(hashes, threshold), expected)
+
+
+def test_invalid_hashes_are_ignored():
+    rng = np.random.default_rng(7)
+    hashes = clustered_hashes(rng)
+    valid = rng.random(len(hashes)) < 0.7
+    pairs = find_pairs(hashes, 6, valid)
+    assert valid[pairs[:, :2]].all()
+    np.testing.assert_array_equal(pairs, brute_force(hashes, 6, valid))
+
+
+def test_identical_hashes_pair_at_distance_zero():
+    hashes = np.array([5, 5, 2**63, 5], dtype=np.uint64)
+    np.testing.assert_array_equal(
+        find_pairs(hashes, 0), [[0, 1, 0], [0, 3, 0], [1, 3, 0]]
+    )
+
+
+def test_empty_input():
+    assert find_pairs(np.zeros(0, dtype=np.uint64), 6).shape == (0, 3)
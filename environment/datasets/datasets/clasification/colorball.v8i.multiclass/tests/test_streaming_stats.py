@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from streaming_stats import BoxStats, Histogram, KLLSketch
+
+QUANTILES = np.linspace(0.01, 0.99, 25)
+
+
+def rank_error(data, sketch):
+    """Máximo error de rango de los cuantiles del sketch frente a los exactos."""
+    data = np.sort(data)
+    ranks = [np.searchsorted(data, sketch.quantile(q)) / len(data) for q in QUANTILES]
+    return np.abs(np.array(ranks) - QUANTILES).max()
+
+
+@pytest.mark.parametrize("shape", ["uniform", "lognormal", "sorted"])
+def test_quantiles_within_rank_error(shape):
+    rng = np.random.default_rng(0)
+    data = {
+        "uniform": rng.random(200_000),
+        "lognormal": rng.lognormal(0, 2, 200_000),
+        "sorted": np.arange(200_000, dtype=float),
+    }[shape]
+    sketch = KLLSketch(k=200, seed=1)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+    assert rank_error(data, sketch) < 0.02
+    assert sketch.n == len(data)
+    assert (sketch.min, sketch.max) == (data.min(), data.max())
+    # Memoria acotada: no guarda todo lo visto
+    assert sum(map(len, sketch.levels)) < 3 * sketch.k
+
+
+def test_merge_matches_single_sketch():
+    rng = np.random.default_rng(2)
+    parts = [rng.normal(i, 1, 30_000) for i in range(4)]
+    merged = KLLSketch(k=200, seed=3)
+    for i, part in enumerate(parts):
+        sketch = KLLSketch(k=200, seed=10 + i)
+        sketch.update(part)
+        merged.merge(sketch)
+    data = np.concatenate(parts)
+    single = KLLSketch(k=200, seed=4)
+    single.update(data)
+
+    assert merged.n == single.n == len(data)
+    assert (merged.min, merged.max) == (data.min(), data.max())
+    assert rank_error(data, merged) < 0.03
+    # La garantía es de rango: en las colas los valores pueden alejarse más
+    data = np.sort(data)
+    for q in QUANTILES:
+        ranks = np.searchsorted(data, [merged.quantile(q), single.quantile(q)])
+        assert abs(ranks[0] - ranks[1]) / len(data) < 0.03
+
+
+def test_merge_into_empty_sketch_and_non_finite_values():
+    source = KLLSketch(k=50, seed=0)
+    source.update([1.0, np.nan, 2.0, np.inf, 3.0])
+    empty = KLLSketch(k=50, seed=0)
+    assert np.isnan(empty.quantile(0.5))
+    empty.merge(source)
+    assert empty.n == 3
+    assert empty.quantile(0.0) == 1.0
+    assert empty.quantile(1.0) == 3.0
+    assert empty.quantile(0.5) == 2.0
+
+
+def test_histogram_merge_equals_single_pass():
+    rng = np.random.default_rng(5)
+    a, b = rng.random(1000), rng.random(500)
+    left, right = Histogram.linear(0, 1), Histogram.linear(0, 1)
+    left.update(a)
+    right.update(b)
+    whole = Histogram.linear(0, 1)
+    whole.update(np.concatenate([a, b]))
+    np.testing.assert_array_equal(left.merge(right).counts, whole.counts)
+
+
+def test_box_stats_counts_boxes_and_classes():
+    boxes = np.array(
+        [
+            [0, 2, 0.5, 0.5, 0.1, 0.2],
+            [0, 0, 0.5, 0.5, 0.3, 0.3],
+            [1, 2, 0.1, 0.1, 0.2, 0.2],
+        ],
+        dtype=np.float32,
+    )
+    stats = BoxStats()
+    stats.update(boxes[:2])
+    other = BoxStats()
+    other.update(boxes[2:])
+    stats.merge(other)
+    assert stats.n == 3
+    assert stats.class_counts() == {0: 1, 2: 2}
@@ -0,0 +1,118 @@
+import os
+import pickle
+
+import numpy as np
+
+import validation_cache
+from validation_cache import (
+    ValidationCache,
+    cache_path,
+    cached,
+    decode_value,
+    encode_value,
+    file_key,
+    open_cache,
+)
+
+
+def make_files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / "train" / f"{i}.txt"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(str(i))
+        paths.append(str(path))
+    return paths
+
+
+def counting(compute):
+    calls = []
+
+    def wrapper(paths):
+        calls.append(list(paths))
+        return compute(paths)
+
+    return wrapper, calls
+
+
+def test_encode_roundtrip():
+    value = [
+        np.arange(6, dtype=np.float32).reshape(2, 3),
+        np.array([2**64 - 1], dtype=np.uint64),
+        b"\x00\xffjpeg",
+        (1, "a", None),
+        {"n": np.int64(3)},
+    ]
+    decoded = decode_value(encode_value(value))
+    np.testing.assert_array_equal(decoded[0], value[0])
+    assert decoded[0].dtype == np.float32
+    np.testing.assert_array_equal(decoded[1], value[1])
+    assert decoded[2] == value[2]
+    assert decoded[3] == [1, "a", None]
+    assert decoded[4] == {"n": 3}
+
+
+def test_only_stale_files_are_recomputed(tmp_path):
+    paths = make_files(tmp_path, 4)
+    cache = ValidationCache(cache_path(str(tmp_path / "train")))
+    compute, calls = counting(lambda ps: [os.path.basename(p) for p in ps])
+
+    assert cached(cache, "kind", paths, compute) == ["0.txt", "1.txt", "2.txt", "3.txt"]
+    assert cached(cache, "kind", paths, compute) == ["0.txt", "1.txt", "2.txt", "3.txt"]
+    assert calls == [paths]
+
+    with open(paths[2], "a") as f:
+        f.write("changed")
+    cached(cache, "kind", paths, compute)
+    assert calls[-1] == [paths[2]]
+    # Otro tipo no comparte entradas
+    cached(cache, "other", paths, compute)
+    assert calls[-1] == paths
+    cache.close()
+
+
+def test_unreadable_rows_are_misses(tmp_path):
+    paths = make_files(tmp_path, 2)
+    cache = ValidationCache(cache_path(str(tmp_path / "train")))
+    keys = [file_key(p) for p in paths]
+    cache.put_many("kind", [(paths[0], keys[0], 1), (paths[1], keys[1], 2)])
+    with cache.conn:
+        cache.conn.execute(
+            "UPDATE entries SET value = ? WHERE path = ?",
+            (pickle.dumps({"evil": 1}), paths[0]),
+        )
+        cache.conn.execute(
+            "UPDATE entries SET value = ? WHERE path = ?", ("{not json", paths[1])
+        )
+    assert cache.get_many("kind", paths, keys) == [None, None]
+    cache.close()
+
+
+def test_prune_drops_deleted_files(tmp_path):
+    paths = make_files(tmp_path, 3)
+    folder = str(tmp_path / "train")
+    cache = ValidationCache(cache_path(folder))
+    cache.put_many("kind", [(p, file_key(p), 0) for p in paths])
+    cache.close()
+    os.remove(paths[1])
+
+    cache = open_cache(folder)
+    stored = [row[0] for row in cache.conn.execute("SELECT path FROM entries")]
+    assert sorted(stored) == [paths[0], paths[2]]
+    assert cache.prune() == 0
+    cache.close()
+
+
+def test_version_change_clears_entries(tmp_path, monkeypatch):
+    paths = make_files(tmp_path, 1)
+    path = cache_path(str(tmp_path / "train"))
+    cache = ValidationCache(path)
+    cache.put_many("kind", [(paths[0], file_key(paths[0]), 1)])
+    cache.close()
+
+    monkeypatch.setattr(
+        validation_cache, "CACHE_VERSION", validation_cache.CACHE_VERSION + 1
+    )
+    cache = ValidationCache(path)
+    assert cache.get_many("kind", paths, [file_key(paths[0])]) == [None]
+    cache.close()
@@ -0,0 +1,200 @@
+"""
+Caché en disco de resultados por fichero para revalidar solo lo que cambia.
+
+Como el ``labels.cache`` de Ultralytics, vive junto a la carpeta validada
+(``train`` -> ``train.validator.cache``). Es un SQLite en modo WAL con una fila
+por ``(tipo, ruta)``: el tipo distingue escaneo de imagen (con su hash
+perceptual) o labels parseados. Una fila solo vale si coinciden tamaño, ``mtime_ns`` e inodo
+del fichero; si no, se recalcula y se sobrescribe.
+
+Varios validadores pueden escribir a la vez: cada lote va en una transacción
+y SQLite espera hasta ``CACHE_TIMEOUT`` segundos a que se libere el bloqueo.
+Al cambiar lo que calcula un analizador hay que subir ``CACHE_VERSION``: la
+caché con otra versión se vacía al abrirla.
+
+La caché viaja con el dataset (se sube o se comparte con él), así que no puede
+ejecutar nada al leerla: los valores se guardan como JSON y los arrays y bytes
+como base64 de sus datos crudos, nunca con pickle. Una fila que no se puede
+decodificar cuenta como ausente. Al abrirla se borran las filas de ficheros
+que ya no existen.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+
+import numpy as np
+from loguru import logger
+
+CACHE_VERSION = 7
+VALIDATOR_CACHE = os.getenv("VALIDATOR_CACHE", "1") == "1"
+CACHE_TIMEOUT = float(os.getenv("VALIDATOR_CACHE_TIMEOUT", "30"))
+# Filas por consulta IN (...) al leer; por debajo del límite de variables de SQLite
+LOOKUP_BATCH = 500
+
+
+def file_key(path):
+    """``(tamaño, mtime_ns, inodo)`` o None si el fichero no existe."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def encode_value(value):
+    """Valor -> JSON; ``ndarray`` y ``bytes`` van etiquetados en base64."""
+
+    def default(obj):
+        if isinstance(obj, np.ndarray):
+            return {
+                "__ndarray__": obj.dtype.str,
+                "shape": obj.shape,
+                "data": base64.b64encode(np.ascontiguousarray(obj).tobytes()).decode(),
+            }
+        if isinstance(obj, bytes):
+            return {"__bytes__": base64.b64encode(obj).decode()}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        raise TypeError(f"not cacheable: {type(obj).__name__}")
+
+    return json.dumps(value, default=default, separators=(",", ":"))
+
+
+def decode_value(text):
+    """Inversa de ``encode_value``; las tuplas vuelven como listas."""
+
+    def object_hook(obj):
+        if "__ndarray__" in obj:
+            dtype = np.dtype(obj["__ndarray__"])
+            if dtype.hasobject:
+                raise ValueError("object arrays are not cacheable")
+            data = base64.b64decode(obj["data"])
+            return np.frombuffer(data, dtype=dtype).reshape(obj["shape"]).copy()
+        if "__bytes__" in obj:
+            return base64.b64decode(obj["__bytes__"])
+        return obj
+
+    return json.loads(text, object_hook=object_hook)
+
+
+def cache_path(folder):
+    return os.path.normpath(folder) + ".validator.cache"
+
+
+def open_cache(folder):
+    """Caché de ``folder``, o None si está desactivada o no se puede abrir."""
+    if not VALIDATOR_CACHE:
+        return None
+    try:
+        cache = ValidationCache(cache_path(folder))
+        cache.prune()
+        return cache
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Caché de validación desactivada para {folder}: {e}")
+        return None
+
+
+class ValidationCache:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=CACHE_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            # IMMEDIATE: dos procesos no pueden migrar la versión a la vez
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "kind TEXT, path TEXT, size INTEGER, mtime_ns INTEGER, "
+                "inode INTEGER, value BLOB, PRIMARY KEY (kind, path))"
+            )
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+            if row is None or row[0] != str(CACHE_VERSION):
+                self.conn.execute("DELETE FROM entries")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (str(CACHE_VERSION),),
+                )
+
+    def get_many(self, kind, paths, keys):
+        """Valor de cada ruta cuya clave coincide; None si falta o está obsoleto."""
+        found = {}
+        for start in range(0, len(paths), LOOKUP_BATCH):
+            batch = paths[start : start + LOOKUP_BATCH]
+            rows = self.conn.execute(
+                "SELECT path, size, mtime_ns, inode, value FROM entries "
+                f"WHERE kind = ? AND path IN ({','.join('?' * len(batch))})",
+                (kind, *batch),
+            )
+            for path, size, mtime_ns, inode, value in rows:
+                found[path] = ((size, mtime_ns, inode), value)
+        values = []
+        for path, key in zip(paths, keys):
+            hit = found.get(path)
+            value = None
+            if hit and key and hit[0] == key:
+                try:
+                    value = decode_value(hit[1])
+                except (ValueError, TypeError, KeyError, RecursionError):
+                    # Fila corrupta o manipulada: se recalcula
+                    value = None
+            values.append(value)
+        return values
+
+    def put_many(self, kind, items):
+        """Guarda ``(ruta, clave, valor)`` en una sola transacción."""
+        rows = [
+            (kind, path, *key, encode_value(value))
+            for path, key, value in items
+            if key is not None
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def prune(self):
+        """Borra las filas de ficheros que ya no existen."""
+        paths = [
+            row[0] for row in self.conn.execute("SELECT DISTINCT path FROM entries")
+        ]
+        gone = [(path,) for path in paths if not os.path.exists(path)]
+        if gone:
+            with self.conn:
+                self.conn.executemany("DELETE FROM entries WHERE path = ?", gone)
+        return len(gone)
+
+    def close(self):
+        self.conn.close()
+
+
+def cached(cache, kind, paths, compute):
+    """``compute(rutas)`` solo para las rutas sin entrada válida en la caché.
+
+    ``compute`` recibe una lista de rutas y devuelve un valor por ruta.
+    La clave se toma antes de calcular: si el fichero cambia entre medias, la
+    siguiente pasada lo vuelve a ver como obsoleto.
+    """
+    paths = list(paths)
+    if cache is None:
+        return compute(paths)
+    keys = [file_key(path) for path in paths]
+    values = cache.get_many(kind, paths, keys)
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        computed = compute([paths[i] for i in missing])
+        for i, value in zip(missing, computed):
+            values[i] = value
+        cache.put_many(kind, [(paths[i], keys[i], values[i]) for i in missing])
+    logger.debug(
+        f"Caché {kind}: {len(paths) - len(missing)} reutilizados, "
+        f"{len(missing)} calculados"
+    )
+    return values
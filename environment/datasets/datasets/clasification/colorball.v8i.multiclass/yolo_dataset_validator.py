@@ -3,17 +3,21 @@ pip install --upgrade pip setuptools wheel
 pip install fpdf2
 """
 
-from ultralytics import YOLO
 import os
 import yaml
 import glob
-import cv2
 from loguru import logger
-from fpdf import FPDF
+
+from image_probe import STATUS_CORRUPT, STATUS_DAMAGED
+
+# ultralytics, cv2 y fpdf se importan en el paso que los necesita para que los
+# chequeos de anotaciones arranquen en milisegundos (validación por subida).
 
 
 class YOLODatasetValidator:
     dataset_type = None
+    model_weights = "yolov8n.pt"
+    _model = None
 
     def __init__(
         self,
@@ -38,7 +42,7 @@ class YOLODatasetValidator:
         )
 
         # Cargar la configuración del dataset
-        if self.dataset_type  is None:
+        if self.dataset_type is None:
             with open(self.dataset_yaml, "r") as f:
                 self.dataset_config = yaml.safe_load(f)
         else:
@@ -48,78 +52,103 @@ class YOLODatasetValidator:
                 "val": os.path.join(self.dataset_path, "val"),
                 "test": os.path.join(self.dataset_path, "test"),
             }
-        
 
-        self.model = YOLO("yolov8n.pt")
+    @property
+    def model(self):
+        """Modelo YOLO, cargado solo la primera vez que un paso lo usa."""
+        if self._model is None:
+            from ultralytics import YOLO
+
+            self._model = YOLO(self.model_weights)
+        return self._model
+
+    def _split_labels(self, split):
+        """Cajas, offsets y líneas mal formadas de los ``.txt`` de un split."""
+        from label_parser import load_labels
+        from validation_cache import open_cache
+
+        folder = self.dataset_config[split]
+        label_files = sorted(glob.glob(os.path.join(folder, "*.txt")))
+        return label_files, load_labels(label_files, open_cache(folder))
 
     def check_class_balance(self):
         """Verificar el balance de clases en el dataset."""
-        class_counts = {name: 0 for name in self.dataset_config["names"]}
+        import numpy as np
+
+        names = self.dataset_config["names"]
+        counts = np.zeros(len(names), dtype=np.int64)
         for split in ["train", "val", "test"]:
             if split in self.dataset_config:
-                image_files = glob.glob(
-                    os.path.join(self.dataset_config[split], "*.txt")
-                )
-                for file in image_files:
-                    with open(file, "r") as anno:
-                        for line in anno.readlines():
-                            class_idx = int(line.split()[0])
-                            class_counts[self.dataset_config["names"][class_idx]] += 1
-        return class_counts
+                _, (boxes, _, _) = self._split_labels(split)
+                classes = boxes[:, 1].astype(np.int64)
+                # Las clases fuera de rango las informa check_annotations
+                valid = classes[(classes >= 0) & (classes < len(names))]
+                counts += np.bincount(valid, minlength=len(names))
+        return {name: int(n) for name, n in zip(names, counts)}
 
     def check_images(self):
-        """Verificar la calidad y validez de las imágenes."""
+        """Verificar la calidad y validez de las imágenes.
+
+        Las dimensiones salen de la cabecera y solo se decodifican las imágenes
+        con la estructura rota (o todas con ``VALIDATOR_FULL_DECODE=1``). Las
+        imágenes se reparten en ``VALIDATOR_WORKERS`` procesos y las que no han
+        cambiado desde la última pasada salen de la caché de validación.
+
+        Solo las que no se decodifican son corruptas; las que se decodifican con
+        la estructura rota se devuelven aparte como aviso.
+        """
+        from dataset_index import scan_images
+        from validation_cache import open_cache
+
         corrupted_images = []
         low_quality_images = []
+        damaged_images = []
         for split in ["train", "val", "test"]:
             if split in self.dataset_config:
                 image_files = glob.glob(
                     os.path.join(self.dataset_config[split], "*.jpg")
                 ) + glob.glob(os.path.join(self.dataset_config[split], "*.png"))
-                for img_path in image_files:
-                    img = cv2.imread(img_path)
-                    if img is None:
+                results = scan_images(
+                    image_files, cache=open_cache(self.dataset_config[split])
+                )
+                for img_path, (width, height, _, _, status, *_) in zip(
+                    image_files, results
+                ):
+                    if status == STATUS_CORRUPT:
                         corrupted_images.append(img_path)
-                    elif (
-                        img.shape[0] < self.min_img_size
-                        or img.shape[1] < self.min_img_size
-                    ):
+                        continue
+                    if status == STATUS_DAMAGED:
+                        damaged_images.append(img_path)
+                    if height < self.min_img_size or width < self.min_img_size:
                         low_quality_images.append(img_path)
-        return corrupted_images, low_quality_images
+        return corrupted_images, low_quality_images, damaged_images
 
     def check_annotations(self):
         """Verificar la validez de las anotaciones."""
+        import numpy as np
+
         invalid_annotations = []
+        n_classes = len(self.dataset_config["names"])
         for split in ["train", "val", "test"]:
             if split in self.dataset_config:
-                label_files = glob.glob(
-                    os.path.join(self.dataset_config[split], "*.txt")
-                )
-                for label_file in label_files:
-                    with open(label_file, "r") as f:
-                        lines = f.readlines()
-                        for line in lines:
-                            try:
-                                parts = line.strip().split()
-                                class_idx = int(parts[0])
-                                if class_idx < 0 or class_idx >= len(
-                                    self.dataset_config["names"]
-                                ):
-                                    invalid_annotations.append(
-                                        f"Invalid class index {class_idx} in {label_file}"
-                                    )
-                                if len(parts) != 5:
-                                    invalid_annotations.append(
-                                        f"Invalid annotation format in {label_file}"
-                                    )
-                            except Exception as e:
-                                invalid_annotations.append(
-                                    f"Error in {label_file}: {e}"
-                                )
+                label_files, (boxes, _, malformed) = self._split_labels(split)
+                for label_file, lineno, text, reason in malformed:
+                    invalid_annotations.append(
+                        f"Invalid annotation format in {label_file}:{lineno} "
+                        f"({reason}): {text!r}"
+                    )
+                classes = boxes[:, 1].astype(np.int64)
+                for row in np.flatnonzero((classes < 0) | (classes >= n_classes)):
+                    invalid_annotations.append(
+                        f"Invalid class index {classes[row]} in "
+                        f"{label_files[int(boxes[row, 0])]}"
+                    )
         return invalid_annotations
 
     def generate_pdf_report(self, validation_results):
         """Generar un informe en PDF con los resultados de la validación."""
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.set_auto_page_break(auto=True, margin=15)
         pdf.add_page()
@@ -140,6 +169,12 @@ class YOLODatasetValidator:
             pdf.cell(200, 10, txt=img_path, ln=True)
         pdf.ln(5)
 
+        # Imágenes dañadas que se decodifican: aviso, no invalidan el dataset
+        pdf.cell(200, 10, txt="Damaged Images (warning):", ln=True)
+        for img_path in validation_results["damaged_images"]:
+            pdf.cell(200, 10, txt=img_path, ln=True)
+        pdf.ln(5)
+
         # Imágenes de baja calidad
         pdf.cell(200, 10, txt="Low Quality Images:", ln=True)
         for img_path in validation_results["low_quality_images"]:
@@ -167,6 +202,7 @@ class YOLODatasetValidator:
             "class_balance": self.check_class_balance(),
             "corrupted_images": [],
             "low_quality_images": [],
+            "damaged_images": [],
             "invalid_annotations": [],
             "is_valid": True,
         }
@@ -175,6 +211,7 @@ class YOLODatasetValidator:
         (
             validation_results["corrupted_images"],
             validation_results["low_quality_images"],
+            validation_results["damaged_images"],
         ) = self.check_images()
         validation_results["invalid_annotations"] = self.check_annotations()
 
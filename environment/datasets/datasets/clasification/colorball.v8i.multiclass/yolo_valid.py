@@ -1,30 +1,120 @@
 import os
 from datetime import datetime
 
-import cv2
-import fiftyone as fo
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import seaborn as sns
-from fpdf import FPDF
 from loguru import logger
-from PIL import Image
-from pydantic import BaseModel
-from ultralytics import YOLO
+
+from image_probe import FULL_DECODE
+
+# Las cajas no se guardan: se resumen al leerlas en histogramas y sketches de
+# memoria fija. Los analizadores leen esos mismos resúmenes en los dos modos.
+STREAMING = os.getenv("VALIDATOR_STREAMING", "0") == "1"
+
+# ultralytics, matplotlib/seaborn, cv2, PIL y fpdf se importan dentro
+# del paso que los usa: importarlos aquí cuesta varios segundos de arranque
+# incluso para un chequeo que solo lee anotaciones.
+
+
+def _plotting():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    return plt, sns
+
+
+def _plot_histogram(plt, hist, color, label=None):
+    """Dibuja un ``streaming_stats.Histogram`` ya agregado."""
+    plt.stairs(hist.counts, hist.edges, fill=True, alpha=0.6, color=color, label=label)
+    if hist.log:
+        plt.xscale("log")
+
+
+def render_mosaic(paths, boxes, filename):
+    """Dibuja las cajas sobre hasta 9 imágenes y guarda el mosaico 3x3."""
+    import cv2
+    import numpy as np
+
+    from dataset_index import CLS, CX, CY, H, W
+
+    mosaic_images = []
+    for path, image_boxes in zip(paths, boxes):
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        for box in () if image_boxes is None else image_boxes:
+            class_id, x_center, y_center, box_width, box_height = box[
+                [CLS, CX, CY, W, H]
+            ]
+            h, w, _ = img.shape
+            x1 = int((x_center - box_width / 2) * w)
+            y1 = int((y_center - box_height / 2) * h)
+            x2 = int((x_center + box_width / 2) * w)
+            y2 = int((y_center + box_height / 2) * h)
+            cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(
+                img,
+                str(int(class_id)),
+                (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (0, 255, 0),
+                2,
+            )
+        mosaic_images.append(img)
+    if not mosaic_images:
+        return None
+    # Todas las celdas con el tamaño de la primera; las que faltan, en negro
+    h, w = mosaic_images[0].shape[:2]
+    tiles = [cv2.resize(img, (w, h)) for img in mosaic_images]
+    tiles += [np.zeros_like(tiles[0])] * (-len(tiles) % 3)
+    rows = [np.hstack(tiles[i : i + 3]) for i in range(0, len(tiles), 3)]
+    cv2.imwrite(filename, np.vstack(rows))
+    return filename
+
+
+def render_mosaics(jobs):
+    return [render_mosaic(*job) for job in jobs]
 
 
 class YOLODataValidator:
-    def __init__(self, image_folder, label_folder, pdf_name, data_yaml, verbose=False):
+    def __init__(
+        self,
+        image_folder,
+        label_folder,
+        pdf_name,
+        data_yaml,
+        verbose=False,
+        full_decode=FULL_DECODE,
+        streaming=STREAMING,
+    ):
         self.image_folder = image_folder
         self.label_folder = label_folder
         self.pdf_name = pdf_name
         self.data_yaml = data_yaml
         self.report_folder = "reports"
         self.verbose = verbose
+        # Decodificar todas las imágenes, no solo las sospechosas
+        self.full_decode = full_decode
+        self.streaming = streaming
+        self._index = None
         os.makedirs(self.report_folder, exist_ok=True)
         self._configure_logger()
 
+    @property
+    def index(self):
+        """Índice columnar del dataset: imágenes y labels se leen una sola vez."""
+        if self._index is None:
+            from dataset_index import DatasetIndex
+            from validation_cache import open_cache
+
+            self._index = DatasetIndex(
+                self.image_folder,
+                self.label_folder,
+                self.full_decode,
+                cache=open_cache(self.image_folder),
+                streaming=self.streaming,
+            )
+        return self._index
+
     def _configure_logger(self):
         logger.remove()
         log_level = "DEBUG" if self.verbose else "INFO"
@@ -37,25 +127,12 @@ class YOLODataValidator:
         logger.add(lambda msg: print(msg, end=""), level=log_level)
 
     def analyze_class_distribution(self):
-        class_counts = {}
-
-        if os.path.exists(self.label_folder):
-            for label_file in os.listdir(self.label_folder):
-                if label_file.endswith(".txt"):
-                    with open(os.path.join(self.label_folder, label_file), "r") as f:
-                        for line in f:
-                            class_id = int(line.split()[0])
-                            class_counts[class_id] = class_counts.get(class_id, 0) + 1
-        else:
-            self.label_folder = [
-                folder
-                for folder in os.listdir(self.image_folder)
-                if os.path.isdir(os.path.join(self.image_folder, folder))
-            ]
-            for label_file in self.label_folder:
-                class_counts[label_file] = len(
-                    os.listdir(os.path.join(self.image_folder, label_file))
-                )
+        plt, sns = _plotting()
+
+        class_counts = self.index.class_counts()
+        if self.index.classification:
+            # Los mosaicos de clasificación usan la lista de carpetas de clase
+            self.label_folder = list(self.index.class_names)
 
         plt.figure(figsize=(10, 6))
         sns.barplot(x=list(class_counts.keys()), y=list(class_counts.values()))
@@ -68,16 +145,12 @@ class YOLODataValidator:
         return class_counts
 
     def analyze_image_sizes(self):
-        widths, heights = [], []
-        for image_file in os.listdir(self.image_folder):
-            if image_file.endswith((".jpg", ".png")):
-                with Image.open(os.path.join(self.image_folder, image_file)) as img:
-                    widths.append(img.width)
-                    heights.append(img.height)
+        plt, _ = _plotting()
 
+        stats = self.index.image_stats()
         plt.figure(figsize=(10, 6))
-        sns.histplot(widths, bins=30, color="blue", label="Width")
-        sns.histplot(heights, bins=30, color="red", label="Height")
+        _plot_histogram(plt, stats.width, "blue", "Width")
+        _plot_histogram(plt, stats.height, "red", "Height")
         plt.xlabel("Pixels")
         plt.ylabel("Frequency")
         plt.title("Image Size Distribution")
@@ -85,40 +158,33 @@ class YOLODataValidator:
         plt.savefig(os.path.join(self.report_folder, "image_size_distribution.png"))
         plt.close()
 
-        return widths, heights
+        return stats.width, stats.height
 
     def analyze_bbox_areas(self):
-        areas = []
-
-        if self.label_folder is None:
-            for label_file in os.listdir(self.label_folder):
-                if label_file.endswith(".txt"):
-                    with open(os.path.join(self.label_folder, label_file), "r") as f:
-                        for line in f:
-                            _, x_center, y_center, box_width, box_height = map(
-                                float, line.split()
-                            )
-                            areas.append(box_width * box_height)
+        plt, _ = _plotting()
 
+        stats = self.index.box_summary()
         plt.figure(figsize=(10, 6))
-        sns.histplot(areas, bins=30, color="green")
+        _plot_histogram(plt, stats.area, "green")
+        quantiles = stats.area_quantiles
+        logger.info(
+            f"Área de cajas: p5={quantiles.quantile(0.05):.4f} "
+            f"p50={quantiles.quantile(0.5):.4f} p95={quantiles.quantile(0.95):.4f}"
+        )
         plt.xlabel("Bounding Box Area (normalized)")
         plt.ylabel("Frequency")
         plt.title("Bounding Box Area Distribution")
         plt.savefig(os.path.join(self.report_folder, "bbox_area_distribution.png"))
         plt.close()
 
-        return areas
+        return stats.area
 
     def analyze_aspect_ratios(self):
-        aspect_ratios = []
-        for image_file in os.listdir(self.image_folder):
-            if image_file.endswith((".jpg", ".png")):
-                with Image.open(os.path.join(self.image_folder, image_file)) as img:
-                    aspect_ratios.append(img.width / img.height)
+        plt, _ = _plotting()
 
+        aspect_ratios = self.index.image_stats().aspect
         plt.figure(figsize=(10, 6))
-        sns.histplot(aspect_ratios, bins=30, color="purple")
+        _plot_histogram(plt, aspect_ratios, "purple")
         plt.xlabel("Aspect Ratio (Width/Height)")
         plt.ylabel("Frequency")
         plt.title("Image Aspect Ratio Distribution")
@@ -127,73 +193,31 @@ class YOLODataValidator:
 
         return aspect_ratios
 
-    def detect_duplicates_and_overlaps(self):
-        if self.label_folder is None:
-            dataset = fo.Dataset.from_dir(
-                dataset_type=fo.types.YOLOv5Dataset,
-                data_path=self.image_folder,
-                labels_path=self.label_folder,
-                yaml_path=self.data_yaml,
-            )
-        else:
+    def detect_duplicates_and_overlaps(self, threshold=None):
+        """Copias exactas y casi-duplicados (redimensionados, recodificados...).
 
-            class Image_classification(BaseModel):
-                filepath: str
-                filename: str
-
-            class Dataset:
-                dataset = []
-
-                def from_dir(self, data_path):
-                    self.dataset = []
-                    for class_name in [
-                        folder
-                        for folder in os.listdir(data_path)
-                        if os.path.isdir(os.path.join(data_path, folder))
-                    ]:
-                        for image_path in os.listdir(
-                            os.path.join(data_path, class_name)
-                        ):
-                            self.dataset.append(
-                                Image_classification(
-                                    filepath=os.path.join(
-                                        data_path, class_name, image_path
-                                    ),
-                                    filename=image_path,
-                                )
-                            )
-                    return self.dataset
-
-            dataset = Dataset().from_dir(self.image_folder)
-
-        image_hashes = {}
-        duplicates = []
-        for sample in dataset:
-            try:
-                img = cv2.imread(sample.filepath)
-            except Exception:
-                continue
-
-            img_hash = hash(img.tobytes())
-            if img_hash in image_hashes:
-                duplicates.append((sample.filename, image_hashes[img_hash]))
-            else:
-                image_hashes[img_hash] = sample.filename
-        return duplicates
+        ``threshold`` es la distancia de Hamming máxima entre hashes de 64 bits
+        (``NEAR_DUP_THRESHOLD``); el hash (ahash, dhash o phash) se elige con
+        ``NEAR_DUP_HASH`` y se calcula al escanear las imágenes.
+        """
+        duplicates = [(a, b, 0) for a, b in self.index.exact_duplicates()]
+        return duplicates + self.index.near_duplicates(threshold)
 
     def validate_yolo_format(self, data_yaml):
+        from ultralytics import YOLO
+
         if self.label_folder is None:
             model = YOLO("yolov8n.pt")
         else:
             model = YOLO("yolov8n-cls.pt")
-            
+
         # model.check_dataset(data_yaml)
-        
+
         # for split in ["val", "test", "train"]:
         #     model.load_data(data_yaml, split=split, visualize=True, save_dir=self.report_folder)
-            
+
         model.tune(data=data_yaml, epochs=1, iterations=3, batch=1, imgsz=640)
-        
+
         model.train(data=data_yaml, epochs=1, imgsz=640, batch=1)
 
         results = model.val(
@@ -207,105 +231,53 @@ class YOLODataValidator:
         return results.results_dict
 
     def validate_image_quality(self):
-        corrupt_images, small_images = [], []
-        for image_file in os.listdir(self.image_folder):
-            if image_file.endswith((".jpg", ".png")):
-                image_path = os.path.join(self.image_folder, image_file)
-                try:
-                    img = cv2.imread(image_path)
-                    if img is None:
-                        corrupt_images.append(image_file)
-                    else:
-                        height, width, _ = img.shape
-                        if width < 64 or height < 64:
-                            small_images.append((image_file, width, height))
-                except Exception:
-                    corrupt_images.append(image_file)
+        import numpy as np
+
+        index = self.index
+        corrupt_images = [index.name(i) for i in np.flatnonzero(~index.ok)]
+        small = index.ok & ((index.width < 64) | (index.height < 64))
+        small_images = [
+            (index.name(i), int(index.width[i]), int(index.height[i]))
+            for i in np.flatnonzero(small)
+        ]
         return corrupt_images, small_images
 
     def generate_example_mosaics(self, num_mosaics=3):
-        image_files = [
-            f for f in os.listdir(self.image_folder) if f.endswith((".jpg", ".png"))
-        ]
+        import numpy as np
 
-        if self.label_folder is None:
-            label_files = {
-                f.replace(".jpg", ".txt").replace(".png", ".txt"): f
-                for f in os.listdir(self.label_folder)
-                if f.endswith(".txt")
-            }
+        from parallel import map_chunks
 
-        mosaics = []
+        index = self.index
+        # Solo imágenes legibles y, en detección, con fichero de labels
+        image_ids = [
+            i
+            for i in np.flatnonzero(index.ok)
+            if index.classification or index.image_label[i] >= 0
+        ]
+
+        # Cada proceso recibe rutas y cajas y devuelve solo el nombre del PNG
+        jobs = []
         for mosaic_idx in range(num_mosaics):
-            mosaic_images = []
-            for _ in range(9):
-                if not image_files:
-                    break
-                img_file = image_files.pop(0)
-
-                if isinstance(self.label_folder, list):
-                    label_file = img_file
-                else:
-                    label_file = img_file.replace(".jpg", ".txt").replace(
-                        ".png", ".txt"
-                    )
-                    if label_file not in label_files:
-                        continue
-
-                img_path, label_path = os.path.join(
-                    self.image_folder, img_file
-                ), os.path.join(self.label_folder, label_file)
-                img = cv2.imread(img_path)
-                if img is None:
-                    continue
-                with open(label_path, "r") as f:
-                    for line in f:
-                        class_id, x_center, y_center, box_width, box_height = map(
-                            float, line.split()
-                        )
-                        h, w, _ = img.shape
-                        x1 = int((x_center - box_width / 2) * w)
-                        y1 = int((y_center - box_height / 2) * h)
-                        x2 = int((x_center + box_width / 2) * w)
-                        y2 = int((y_center + box_height / 2) * h)
-                        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(
-                            img,
-                            str(int(class_id)),
-                            (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.5,
-                            (0, 255, 0),
-                            2,
-                        )
-                mosaic_images.append(img)
-            if mosaic_images:
-                mosaic = np.zeros_like(mosaic_images[0])
-                rows = []
-                for row_idx in range(3):
-                    row = np.hstack(mosaic_images[row_idx * 3 : (row_idx + 1) * 3])
-                    rows.append(row)
-                mosaic = np.vstack(rows)
-                mosaic_filename = os.path.join(
-                    self.report_folder, f"mosaic_{mosaic_idx}.png"
-                )
-                cv2.imwrite(mosaic_filename, mosaic)
-                mosaics.append(mosaic_filename)
-        return mosaics
+            ids = image_ids[mosaic_idx * 9 : (mosaic_idx + 1) * 9]
+            if not ids:
+                break
+            paths = [index.image_paths[i] for i in ids]
+            boxes = [
+                None if index.classification else index.boxes_of(index.image_label[i])
+                for i in ids
+            ]
+            filename = os.path.join(self.report_folder, f"mosaic_{mosaic_idx}.png")
+            jobs.append((paths, boxes, filename))
+
+        results = map_chunks(render_mosaics, jobs, chunksize=1)
+        return [name for chunk in results for name in chunk if name]
 
     def analyze_bbox_aspect_ratios(self):
-        aspect_ratios = []
+        plt, _ = _plotting()
 
-        if self.label_folder is None:
-            for label_file in os.listdir(self.label_folder):
-                if label_file.endswith(".txt"):
-                    with open(os.path.join(self.label_folder, label_file), "r") as f:
-                        for line in f:
-                            _, _, _, box_width, box_height = map(float, line.split())
-                            if box_height != 0:  # Evitar división por cero
-                                aspect_ratios.append(box_width / box_height)
+        aspect_ratios = self.index.box_summary().aspect
         plt.figure(figsize=(10, 6))
-        sns.histplot(aspect_ratios, bins=30, color="orange")
+        _plot_histogram(plt, aspect_ratios, "orange")
         plt.xlabel("Bounding Box Aspect Ratio (Width/Height)")
         plt.ylabel("Frequency")
         plt.title("Bounding Box Aspect Ratio Distribution")
@@ -316,24 +288,17 @@ class YOLODataValidator:
         return aspect_ratios
 
     def analyze_bbox_center_positions(self):
-        x_centers, y_centers = [], []
+        plt, _ = _plotting()
 
-        if self.label_folder is None:
-            for label_file in os.listdir(self.label_folder):
-                if label_file.endswith(".txt"):
-                    with open(os.path.join(self.label_folder, label_file), "r") as f:
-                        for line in f:
-                            _, x_center, y_center, _, _ = map(float, line.split())
-                            x_centers.append(x_center)
-                            y_centers.append(y_center)
+        stats = self.index.box_summary()
         plt.figure(figsize=(12, 6))
         plt.subplot(1, 2, 1)
-        sns.histplot(x_centers, bins=30, color="purple")
+        _plot_histogram(plt, stats.cx, "purple")
         plt.xlabel("Bounding Box X Center (normalized)")
         plt.ylabel("Frequency")
         plt.title("Bounding Box X Center Distribution")
         plt.subplot(1, 2, 2)
-        sns.histplot(y_centers, bins=30, color="blue")
+        _plot_histogram(plt, stats.cy, "blue")
         plt.xlabel("Bounding Box Y Center (normalized)")
         plt.ylabel("Frequency")
         plt.title("Bounding Box Y Center Distribution")
@@ -341,28 +306,30 @@ class YOLODataValidator:
             os.path.join(self.report_folder, "bbox_center_position_distribution.png")
         )
         plt.close()
-        return x_centers, y_centers
+        return stats.cx, stats.cy
 
     def analyze_bbox_width_height(self):
-        widths, heights = [], []
-        if self.label_folder is None:
-            for label_file in os.listdir(self.label_folder):
-                if label_file.endswith(".txt"):
-                    with open(os.path.join(self.label_folder, label_file), "r") as f:
-                        for line in f:
-                            _, _, _, box_width, box_height = map(float, line.split())
-                            widths.append(box_width)
-                            heights.append(box_height)
+        import numpy as np
+
+        plt, _ = _plotting()
 
+        # Densidad del histograma 2D en lugar de un punto por caja
+        hist = self.index.box_summary().width_height
         plt.figure(figsize=(8, 8))
-        plt.scatter(widths, heights, alpha=0.5)
+        plt.pcolormesh(
+            hist.xedges,
+            hist.yedges,
+            np.ma.masked_equal(hist.counts.T, 0),
+            cmap="viridis",
+        )
+        plt.colorbar(label="Boxes")
         plt.xlabel("Bounding Box Width (normalized)")
         plt.ylabel("Bounding Box Height (normalized)")
         plt.title("Bounding Box Width vs Height")
         plt.grid(True)
         plt.savefig(os.path.join(self.report_folder, "bbox_width_height.png"))
         plt.close()
-        return widths, heights
+        return hist
 
     # 8. Generar reporte en PDF
     def generate_pdf_report(
@@ -379,6 +346,8 @@ class YOLODataValidator:
         bbox_center_positions,
         bbox_width_height,
     ):
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
@@ -501,7 +470,9 @@ class YOLODataValidator:
         pdf.cell(200, 10, txt="Imágenes Duplicadas:", ln=True)
         if duplicates:
             for dup in duplicates:
-                pdf.cell(200, 10, txt=f"- {dup[0]} y {dup[1]}", ln=True)
+                pdf.cell(
+                    200, 10, txt=f"- {dup[0]} y {dup[1]} (distancia {dup[2]})", ln=True
+                )
         else:
             pdf.cell(200, 10, txt="No se encontraron imágenes duplicadas.", ln=True)
         pdf.ln(10)
@@ -527,6 +498,12 @@ class YOLODataValidator:
         self.data_yaml = data_yaml
         try:
             logger.info("Iniciando validación...")
+            logger.info("Indexando imágenes y labels (una sola pasada)...")
+            index = self.index
+            logger.info(
+                f"{len(index.image_paths)} imágenes, {index.box_count} cajas, "
+                f"{len(index.malformed)} líneas de label mal formadas"
+            )
             logger.info("Validando distribución de clases...")
             class_distribution = self.analyze_class_distribution()
             logger.info("Analizando tamaños de imágenes...")
@@ -0,0 +1,295 @@
+"""Cliente HTTP asíncrono compartido para la API Gateway de NeuralForgeAI.
+
+Todos los callbacks de Gradio pasan por el mismo pool keep-alive, de modo que
+los clicks repetidos y la ráfaga de carga de página reutilizan conexiones
+abiertas en lugar de pagar el establecimiento de conexión en cada petición.
+
+Cada llamada tiene un presupuesto total (deadline) que incluye reintentos
+hedged, y un circuit breaker corta las llamadas en cuanto el gateway acumula
+fallos seguidos, para que los callbacks fallen rápido en vez de agotar el
+pool de hilos de Gradio esperando timeouts.
+
+Los GET de JSON son condicionales: se guarda el ETag/Last-Modified de cada
+ruta y, si el gateway responde 304, se reutiliza el objeto ya parseado sin
+descargar ni decodificar de nuevo. httpx ya negocia gzip/deflate (y brotli o
+zstd si sus paquetes están instalados) y descomprime de forma transparente.
+
+Con ``API_GATEWAYS="sede=url,sede2=url2"`` se configuran varios gateways (uno
+por sede); cada uno tiene su propio pool, breaker y validadores. Las funciones
+de módulo (``get``, ``post``...) usan el primero, que con un solo gateway es
+``API_URL``.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+import httpx
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # opcional: json de la stdlib si no está instalado
+    orjson = None
+
+API_URL = os.getenv("API_URL", "http://fastapi:8000")
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+API_KEEPALIVE_EXPIRY = float(os.getenv("API_KEEPALIVE_EXPIRY", "60"))
+READ_DEADLINE = float(os.getenv("READ_DEADLINE", "5"))
+WRITE_DEADLINE = float(os.getenv("WRITE_DEADLINE", "15"))
+UPLOAD_DEADLINE = float(os.getenv("UPLOAD_DEADLINE", "30"))
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "0.3"))
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "15"))
+CONDITIONAL_CACHE_SIZE = int(os.getenv("CONDITIONAL_CACHE_SIZE", "256"))
+API_GATEWAYS = os.getenv("API_GATEWAYS", "")
+DEFAULT_SITE = "default"
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class CircuitOpenError(httpx.TransportError):
+    """El breaker está abierto: no se llama al gateway."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError("gateway circuit open, failing fast")
+        if state == "half-open":
+            # Una sola sonda a la vez; si se pierde, otra pasa tras reset_timeout
+            now = time.monotonic()
+            if self._probe_at and now - self._probe_at < self.reset_timeout:
+                raise CircuitOpenError("gateway circuit half-open, probe in flight")
+            self._probe_at = now
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_at = None
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def parse_gateways(spec, default_url=API_URL):
+    """``"mad=http://a:8000,bog=http://b:8000"`` -> ``{"mad": url, "bog": url}``.
+
+    Sin nombre, la sede se llama como el host. Vacío -> solo ``API_URL``.
+    """
+    sites = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep:
+            url, name = entry, httpx.URL(entry).host
+        sites[name.strip()] = url.strip()
+    return sites or {DEFAULT_SITE: default_url}
+
+
+class Gateway:
+    def __init__(self, site, url):
+        self.site = site
+        self.url = url
+        self.breaker = CircuitBreaker()
+        self._client = None
+        # ruta -> (etag, last_modified, valor parseado)
+        self._validators = OrderedDict()
+
+    def get_client(self):
+        """Devuelve el cliente de esta sede, creándolo en el primer uso."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                timeout=API_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=API_MAX_CONNECTIONS,
+                    max_keepalive_connections=API_MAX_CONNECTIONS,
+                    keepalive_expiry=API_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    async def _hedged_get(self, path, **kwargs):
+        """GET idempotente: si no responde en HEDGE_DELAY se lanza una segunda
+        copia y gana la primera respuesta correcta."""
+        client = self.get_client()
+        first = asyncio.ensure_future(client.get(path, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=HEDGE_DELAY)
+        if done:
+            return first.result()
+        tasks = {first, asyncio.ensure_future(client.get(path, **kwargs))}
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def request(self, method, path, deadline=API_TIMEOUT, hedge=False, **kwargs):
+        """Petición con presupuesto total ``deadline`` y protección del breaker."""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.observe_upstream(
+                method, path, 0.0, reason="circuit_open", site=self.site
+            )
+            raise
+        kwargs.setdefault("timeout", deadline)
+        if hedge and method == "GET":
+            call = self._hedged_get(path, **kwargs)
+        else:
+            call = self.get_client().request(method, path, **kwargs)
+        start = time.monotonic()
+        try:
+            r = await asyncio.wait_for(call, deadline)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            metrics.observe_upstream(
+                method, path, time.monotonic() - start, reason="timeout", site=self.site
+            )
+            raise httpx.TimeoutException(
+                f"{self.site} {method} {path}: deadline of {deadline}s exceeded"
+            )
+        except httpx.TransportError as e:
+            self.breaker.record_failure()
+            metrics.observe_upstream(
+                method,
+                path,
+                time.monotonic() - start,
+                reason=type(e).__name__,
+                site=self.site,
+            )
+            raise
+        metrics.observe_upstream(
+            method, path, time.monotonic() - start, response=r, site=self.site
+        )
+        if r.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return r
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def get_json(self, path, deadline=READ_DEADLINE, hedge=True):
+        """GET condicional que devuelve el JSON parseado.
+
+        Con un 304 se devuelve el mismo objeto que la última vez, de modo que
+        los llamadores pueden detectar "sin cambios" por identidad.
+        """
+        cached = self._validators.get(path)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        r = await self.request(
+            "GET", path, deadline=deadline, hedge=hedge, headers=headers
+        )
+        if r.status_code == 304 and cached is not None:
+            metrics.observe_not_modified("GET", path, site=self.site)
+            self._validators.move_to_end(path)
+            return cached[2]
+        r.raise_for_status()
+        value = loads(r.content)
+        etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._validators[path] = (etag, last_modified, value)
+            self._validators.move_to_end(path)
+            if len(self._validators) > CONDITIONAL_CACHE_SIZE:
+                self._validators.popitem(last=False)
+        else:
+            self._validators.pop(path, None)
+        return value
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request("DELETE", path, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+gateways = {
+    site: Gateway(site, url) for site, url in parse_gateways(API_GATEWAYS).items()
+}
+default_gateway = next(iter(gateways.values()))
+breaker = default_gateway.breaker
+
+
+def gateway(site=None):
+    """Gateway de ``site``; sin sede (o desconocida) el gateway por defecto."""
+    return gateways.get(site, default_gateway)
+
+
+def get_client():
+    return default_gateway.get_client()
+
+
+async def request(method, path, **kwargs):
+    return await default_gateway.request(method, path, **kwargs)
+
+
+async def get(path, **kwargs):
+    return await default_gateway.get(path, **kwargs)
+
+
+async def get_json(path, **kwargs):
+    return await default_gateway.get_json(path, **kwargs)
+
+
+async def post(path, **kwargs):
+    return await default_gateway.post(path, **kwargs)
+
+
+async def delete(path, **kwargs):
+    return await default_gateway.delete(path, **kwargs)
+
+
+async def gather(*calls):
+    """Lanza llamadas independientes en paralelo sobre el mismo pool."""
+    return await asyncio.gather(*calls)
+
+
+async def aclose():
+    for gw in gateways.values():
+        await gw.aclose()
@@ -1,79 +1,432 @@
+import asyncio
 import gradio as gr
-import requests
+import html
+import pandas as pd
+import httpx
+import logging
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-API_URL = os.getenv("API_URL", "http://fastapi:8000")
+import api_client
+from batch import (
+    BATCH_CONCURRENCY,
+    BATCH_RATE,
+    expand_grid,
+    load_configs,
+    load_directory_upload,
+    parse_grid,
+    submit_batch,
+)
+from bulk import BULK_CONCURRENCY, parse_task_ids, run_bulk
+from cache import TTLCache
+from federation import Federation, split_qualified
+from history import HistoryStore, snapshot_metrics
+from metrics import instrument, start_server as start_metrics_server
+from poller import POLL_INTERVAL, TERMINAL_STATES, ClusterPoller
+from redis_queues import RedisQueueReader
+from studies import StudyStatusStore, watch
+from task_index import ALL, SORT_KEYS, TaskIndex
+from task_lookup import TaskLookup, clean_id
+
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", "50"))
+RESULT_PREVIEW_CHARS = int(os.getenv("RESULT_PREVIEW_CHARS", "4000"))
+# Segundos mínimos entre dos avisos del mismo fallo repetido (Redis, histórico)
+ERROR_LOG_INTERVAL = float(os.getenv("ERROR_LOG_INTERVAL", "60"))
+STATE_EMOJI = {
+    "PENDING": "⏳",
+    "STARTED": "🔄",
+    "SUCCESS": "✅",
+    "FAILURE": "❌",
+    "RETRY": "🔁",
+}
 
+logger = logging.getLogger(__name__)
+api_cache = TTLCache()
+federation = Federation(api_client.gateways)
+# study_id -> sede que lo lanzó (o donde se encontró)
+study_sites = {}
 
-def get_workers():
-    try:
-        r = requests.get(f"{API_URL}/workers", timeout=10)
-        return r.json() if r.status_code == 200 else []
-    except:
-        return []
+
+async def fetch_json(path, deadline=api_client.READ_DEADLINE, site=None):
+    return await api_client.gateway(site).get_json(path, deadline=deadline)
+
+
+async def fetch_study(study_id):
+    """Estado de un estudio en su sede; si no se conoce, se pregunta a todas."""
+    site = study_sites.get(study_id)
+    if site is not None or not federation.multi_site:
+        return await fetch_json(f"/status/{study_id}", site=site)
+    sites = federation.sites
+    results = await asyncio.gather(
+        *[fetch_json(f"/status/{study_id}", site=s) for s in sites],
+        return_exceptions=True,
+    )
+    found = [(s, r) for s, r in zip(sites, results) if not isinstance(r, Exception)]
+    if not found:
+        raise results[0]
+    # Celery responde PENDING para IDs desconocidos: se prefiere otro estado
+    site, data = next(
+        ((s, r) for s, r in found if r.get("state") != "PENDING"), found[0]
+    )
+    if data.get("state") != "PENDING":
+        study_sites[study_id] = site
+    return data
+
+
+# Sin TTL: un estado intermedio cacheado retrasaría los cambios en el modo watch.
+# Cada sondeo va al gateway (GET condicional, barato si no cambia) y solo los
+# estados terminales se guardan, en el propio ``StudyStatusStore``.
+study_store = StudyStatusStore(fetch_study)
+
+redis_reader = RedisQueueReader.from_url()
+_redis_errors = {"logged_at": None, "suppressed": 0}
+# (respuesta del gateway, la misma marcada como fallback): se reutiliza mientras
+# el GET condicional devuelva el mismo objeto, así el índice no se reconstruye
+_redis_fallback = (None, None)
+
+
+def log_throttled(errors, message):
+    """Registra ``message`` con la traza, como mucho uno cada ``ERROR_LOG_INTERVAL``.
+
+    ``errors`` guarda el estado de cada tipo de fallo entre llamadas.
+    """
+    now = time.monotonic()
+    last = errors["logged_at"]
+    if last is not None and now - last < ERROR_LOG_INTERVAL:
+        errors["suppressed"] += 1
+        return
+    logger.warning(
+        message + " (%d more failures since the last warning)",
+        errors["suppressed"],
+        exc_info=True,
+    )
+    errors.update(logged_at=now, suppressed=0)
+
+
+def mark_fallback(data):
+    global _redis_fallback
+    if _redis_fallback[0] is not data:
+        _redis_fallback = (data, dict(data, source="gateway (Redis unavailable)"))
+    return _redis_fallback[1]
+
+
+async def fetch_tasks(site=None):
+    """Lee las colas directamente de Redis si está configurado; si no, el gateway.
+
+    ``REDIS_URL`` es el broker de la sede por defecto; el resto usa su gateway.
+    Si Redis falla se usa el gateway y el origen de las tareas lo indica.
+    """
+    if (
+        redis_reader is not None
+        and api_client.gateway(site) is api_client.default_gateway
+    ):
+        try:
+            return await redis_reader.queued_tasks()
+        except Exception:
+            log_throttled(
+                _redis_errors,
+                "Redis queue read failed, falling back to the gateway /tasks",
+            )
+        return mark_fallback(await fetch_json("/tasks", site=site))
+    return await fetch_json("/tasks", site=site)
+
+
+async def fetch_all_workers():
+    values = await federation.gather(
+        "workers",
+        lambda site: api_cache.get(
+            f"{site}:workers", lambda: fetch_json("/workers", site=site)
+        ),
+    )
+    return federation.merge_workers(values)
+
+
+async def fetch_all_tasks():
+    values = await federation.gather(
+        "tasks",
+        lambda site: api_cache.get(f"{site}:tasks", lambda: fetch_tasks(site)),
+    )
+    return federation.merge_tasks(values)
 
 
-def get_queued_tasks():
+def invalidate_tasks():
+    """Tras encolar o revocar: descarta las tareas cacheadas y adelanta el sondeo."""
+    for site in federation.sites:
+        api_cache.invalidate(f"{site}:tasks")
+    poller.wake()
+
+
+history = HistoryStore()
+_history_errors = {"logged_at": None, "suppressed": 0}
+HISTORY_RANGES = {
+    "15 min": 900,
+    "6 h": 6 * 3600,
+    "24 h": 86400,
+    "7 days": 7 * 86400,
+    "30 days": 30 * 86400,
+}
+
+
+# Todas las lecturas y escrituras del histórico van a este único hilo: los
+# INSERT y commit de SQLite no bloquean el loop, se aplican en orden y el ring
+# buffer nunca se recorre mientras otro hilo lo modifica
+history_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+
+
+def write_history(values, ts):
     try:
-        r = requests.get(f"{API_URL}/tasks", timeout=10)
-        return r.json() if r.status_code == 200 else {"queued_tasks": []}
-    except:
-        return {"queued_tasks": []}
+        history.record(values, ts)
+    except Exception:
+        # El histórico nunca debe tumbar el poller (p. ej. disco lleno), pero el
+        # fallo tiene que verse: BD bloqueada, disco lleno, esquema distinto...
+        log_throttled(_history_errors, "History write failed, dropping the sample")
+
+
+def record_history(snapshot):
+    asyncio.get_running_loop().run_in_executor(
+        history_thread, write_history, snapshot_metrics(snapshot), time.time()
+    )
+
+
+task_lookup = TaskLookup()
+_lookup_update = None
+
+
+def refresh_task_lookup(snapshot):
+    """Aplica el snapshot al índice de búsqueda en un hilo, sin bloquear el loop.
+
+    Si sigue en curso la actualización anterior, el siguiente sondeo la retoma.
+    """
+    global _lookup_update
+    tasks = snapshot["tasks"].get("queued_tasks", [])
+    if tasks is task_lookup.source or (_lookup_update and not _lookup_update.done()):
+        return
+    _lookup_update = asyncio.ensure_future(asyncio.to_thread(task_lookup.update, tasks))
 
 
-def get_all_status():
-    workers = get_workers()
-    tasks = get_queued_tasks()
-    return len(workers), len(tasks.get("queued_tasks", []))
+def on_snapshot(snapshot):
+    record_history(snapshot)
+    refresh_task_lookup(snapshot)
 
 
-def refresh_workers_table():
-    workers = get_workers()
+poller = ClusterPoller(
+    fetch_workers=fetch_all_workers,
+    fetch_tasks=fetch_all_tasks,
+    fetch_status=study_store.get,
+    on_snapshot=on_snapshot,
+)
+
+
+async def get_workers():
+    snapshot = await poller.current()
+    return snapshot["workers"]
+
+
+async def get_queued_tasks():
+    snapshot = await poller.current()
+    return snapshot["tasks"]
+
+
+async def get_all_status():
+    snapshot = await poller.current()
+    return len(snapshot["workers"]), len(snapshot["tasks"].get("queued_tasks", []))
+
+
+def build_workers_rows(workers):
     if not workers:
         return [["No workers available"]]
     return [[w] for w in workers]
 
 
-def refresh_tasks_table():
-    result = get_queued_tasks()
-    tasks = result.get("queued_tasks", [])
+def task_row(t):
+    return [
+        t.get("task_id", "")[:16] + "...",
+        t.get("state", ""),
+        t.get("worker", ""),
+        t.get("priority", ""),
+        t.get("args", "")[:35] + "...",
+    ]
+
+
+def build_tasks_rows(tasks):
     if not tasks:
-        return [["No tasks in queue", "", "", ""]]
-    rows = []
-    for t in tasks:
-        rows.append(
-            [
-                t.get("task_id", "")[:16] + "...",
-                t.get("state", ""),
-                t.get("worker", ""),
-                t.get("args", "")[:35] + "...",
-            ]
-        )
-    return rows
+        return [["No tasks in queue", "", "", "", ""]]
+    return [task_row(t) for t in tasks]
+
+
+_task_index = None
+
+
+def get_task_index(snapshot):
+    """Reconstruye el índice solo cuando el snapshot trae una lista nueva."""
+    global _task_index
+    tasks = snapshot["tasks"].get("queued_tasks", [])
+    if _task_index is None or _task_index.tasks is not tasks:
+        _task_index = TaskIndex(tasks)
+    return _task_index
+
+
+def query_task_page(
+    snapshot, state, worker, priority, text, sort_key, descending, page
+):
+    index = get_task_index(snapshot)
+    filters = {"state": state, "worker": worker, "priority": priority}
+    tasks, total, page = index.query(
+        filters, text, sort_key, descending, page=page, page_size=TASKS_PAGE_SIZE
+    )
+    return tasks, total, page, -(-total // TASKS_PAGE_SIZE) or 1
+
+
+def page_info_html(page, pages, total, snapshot):
+    tasks = snapshot["tasks"]
+    source = tasks.get("source", "gateway")
+    if tasks.get("truncated"):
+        source += f", first {len(tasks['queued_tasks'])} of "
+        source += f"{sum(tasks['queue_depths'].values())} queued"
+    return (
+        '<div style="color: var(--text-muted); font-size: 12px;">'
+        f"Page {page} of {pages} · {total} matching tasks · source: {source}</div>"
+    )
+
+
+def task_filter_choices(snapshot):
+    index = get_task_index(snapshot)
+    return tuple(
+        gr.update(choices=[ALL] + index.values(key))
+        for key in ("state", "worker", "priority")
+    )
+
+
+_task_sites = (None, {})
+
+
+def task_site(task_id):
+    """Sede de una tarea según el último snapshot; None -> gateway por defecto."""
+    global _task_sites
+    if not federation.multi_site:
+        return None
+    tasks = poller.snapshot["tasks"].get("queued_tasks", [])
+    if _task_sites[0] is not tasks:
+        _task_sites = (tasks, {t.get("task_id"): t.get("site") for t in tasks})
+    return _task_sites[1].get(task_id)
 
 
-def start_training(config_file, mode, priority, worker_name):
+def diff_task_rows(previous, current):
+    """Compara dos índices ``task_id -> fila`` y devuelve solo lo que cambió."""
+    return {
+        "added": [k for k in current if k not in previous],
+        "changed": [k for k in current if k in previous and previous[k] != current[k]],
+        "removed": [k for k in previous if k not in current],
+    }
+
+
+@instrument
+async def refresh_workers_table():
+    return build_workers_rows(await get_workers())
+
+
+@instrument
+async def refresh_tasks_table(
+    state=ALL,
+    worker=ALL,
+    priority=ALL,
+    text="",
+    sort_key="task_id",
+    descending=False,
+    page=1,
+):
+    snapshot = await poller.current()
+    tasks, total, page, pages = query_task_page(
+        snapshot, state, worker, priority, text, sort_key, descending, page
+    )
+    return build_tasks_rows(tasks), page_info_html(page, pages, total, snapshot), page
+
+
+@instrument
+async def first_task_page(*filters):
+    return await refresh_tasks_table(*filters[:-1], 1)
+
+
+@instrument
+async def prev_task_page(*filters):
+    return await refresh_tasks_table(*filters[:-1], (filters[-1] or 1) - 1)
+
+
+@instrument
+async def next_task_page(*filters):
+    return await refresh_tasks_table(*filters[:-1], (filters[-1] or 1) + 1)
+
+
+@instrument
+async def refresh_task_filters():
+    return task_filter_choices(await poller.current())
+
+
+@instrument
+async def live_tasks_tick(
+    state, worker, priority, text, sort_key, descending, page, live_state
+):
+    """Tick del modo live: no envía nada al navegador si no hubo cambios."""
+    snapshot = await poller.current()
+    filters = [state, worker, priority, text, sort_key, descending, page]
+    if (
+        live_state
+        and live_state["version"] == poller.polls
+        and live_state["filters"] == filters
+    ):
+        return gr.skip(), gr.skip(), live_state
+    tasks, _, _, _ = query_task_page(snapshot, *filters)
+    current = {t.get("task_id", ""): task_row(t) for t in tasks}
+    previous = live_state["rows"] if live_state else {}
+    delta = diff_task_rows(previous, current)
+    new_state = {"version": poller.polls, "filters": filters, "rows": current}
+    if not any(delta.values()):
+        return gr.skip(), gr.skip(), new_state
+    summary = (
+        '<div style="color: var(--text-muted); font-size: 12px;">'
+        f"🔴 Live · +{len(delta['added'])} added · {len(delta['changed'])} changed · "
+        f"-{len(delta['removed'])} removed · {datetime.now().strftime('%H:%M:%S')}</div>"
+    )
+    return build_tasks_rows(tasks), summary, new_state
+
+
+async def submit_config(name, content, mode, priority, worker_name, site=None):
+    """Encola un config en la sede del worker elegido (privado) o en ``site``."""
+    worker_site, worker_name = split_qualified(worker_name, federation.sites)
+    if mode == "private" and worker_site is not None:
+        site = worker_site
+    gateway = api_client.gateway(site)
+    files = {"config_file": (os.path.basename(name), content, "application/x-yaml")}
+    data = {
+        "mode": mode,
+        "priority": priority if mode == "public" else "medium",
+        "worker_name": worker_name if mode == "private" else "",
+    }
+    r = await gateway.post(
+        "/train", files=files, data=data, deadline=api_client.UPLOAD_DEADLINE
+    )
+    if r.status_code == 200 and federation.multi_site:
+        study_sites[r.json()["study_id"]] = gateway.site
+    return r
+
+
+@instrument
+async def start_training(config_file, mode, priority, worker_name, site=None):
     if config_file is None:
         return "⚠️ Please upload a YAML file first."
     try:
         with open(config_file.name, "rb") as f:
-            files = {
-                "config_file": (
-                    os.path.basename(config_file.name),
-                    f,
-                    "application/x-yaml",
-                )
-            }
-            data = {
-                "mode": mode,
-                "priority": priority if mode == "public" else "medium",
-                "worker_name": worker_name if mode == "private" else "",
-            }
-            r = requests.post(f"{API_URL}/train", files=files, data=data, timeout=30)
+            content = f.read()
+        r = await submit_config(
+            config_file.name, content, mode, priority, worker_name, site
+        )
         if r.status_code == 200:
+            invalidate_tasks()
             res = r.json()
+            poller.track_study(res["study_id"])
             return f"""✅ <b>Study Queued Successfully!</b>
 
 📋 <b>Study ID:</b> <code>{res["study_id"]}</code>
@@ -86,52 +439,190 @@ def start_training(config_file, mode, priority, worker_name):
         return f"❌ Connection Error: {str(e)}"
 
 
-def check_status(study_id):
+@instrument
+async def launch_batch(
+    config_files,
+    config_dir,
+    base_file,
+    grid_text,
+    mode,
+    priority,
+    worker_name,
+    concurrency,
+    rate,
+    site=None,
+    progress=gr.Progress(),
+):
+    """Lanza muchos estudios en paralelo y emite cada Study ID según llega."""
+    try:
+        configs = load_configs(config_files) + load_directory_upload(config_dir)
+    except Exception as e:
+        yield f"❌ Could not read the uploaded configs: {html.escape(str(e))}", []
+        return
+    if base_file is not None:
+        try:
+            base_path = getattr(base_file, "name", base_file)
+            with open(base_path, "rb") as f:
+                base_content = f.read()
+            configs += expand_grid(base_path, base_content, parse_grid(grid_text))
+        except Exception as e:
+            yield f"❌ Invalid grid or base config: {html.escape(str(e))}", []
+            return
+    if not configs:
+        yield "⚠️ Upload YAML files, a directory/zip, or a base config first.", []
+        return
+
+    async def submit(name, content):
+        return await submit_config(name, content, mode, priority, worker_name, site)
+
+    total, ok, rows = len(configs), 0, []
+    async for name, r, error in submit_batch(configs, submit, concurrency, rate):
+        if r is not None and r.status_code == 200:
+            study_id = r.json()["study_id"]
+            poller.track_study(study_id)
+            ok += 1
+            rows.append([name, study_id, "✅ queued"])
+        else:
+            rows.append([name, "", f"❌ {error or r.text[:120]}"])
+        progress((len(rows), total), desc=f"Launching {len(rows)}/{total}")
+        yield f"<b>Batch:</b> {len(rows)}/{total} submitted · ✅ {ok}", rows
+
+    invalidate_tasks()
+
+
+def render_result(result, full=False):
+    text = json.dumps(result, indent=2)
+    if full or len(text) <= RESULT_PREVIEW_CHARS:
+        return f"<pre>{html.escape(text)}</pre>"
+    return (
+        f"<pre>{html.escape(text[:RESULT_PREVIEW_CHARS])}\n…</pre>"
+        f"<i>Truncated: showing {RESULT_PREVIEW_CHARS} of {len(text)} characters. "
+        "Use 📄 Load Full Result to see everything.</i>"
+    )
+
+
+@instrument
+async def check_status(study_id, full=False):
     if not study_id:
         return "⚠️ Enter a Study ID"
+    study_id = study_id.strip()
     try:
-        r = requests.get(f"{API_URL}/status/{study_id}")
-        if r.status_code == 200:
-            data = r.json()
-            state = data.get("state", "UNKNOWN")
-            state_emoji = {
-                "PENDING": "⏳",
-                "STARTED": "🔄",
-                "SUCCESS": "✅",
-                "FAILURE": "❌",
-                "RETRY": "🔁",
-            }.get(state, "❓")
-            return f"""<b>Status for:</b> <code>{study_id}</code>
+        data = await study_store.get(study_id)
+        state = data.get("state", "UNKNOWN")
+        poller.track_study(study_id, state)
+        state_emoji = STATE_EMOJI.get(state, "❓")
+        return f"""<b>Status for:</b> <code>{study_id}</code>
 
 {state_emoji} <b>State:</b> {state}
 
 📦 <b>Result:</b>
-<pre>{json.dumps(data.get("result", {}), indent=2)}</pre>"""
-        return f"❌ Error: {r.text}"
+{render_result(data.get("result", {}), full)}"""
+    except httpx.HTTPStatusError as e:
+        return f"❌ Error: {e.response.text}"
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
 
-def delete_task(task_id):
+@instrument
+async def load_full_result(study_id):
+    return await check_status(study_id, full=True)
+
+
+def render_watch(history):
+    rows = []
+    for study_id, changes in history.items():
+        state = changes[-1][1] if changes else "UNKNOWN"
+        timeline = " → ".join(
+            f"{html.escape(str(s))} "
+            f"<small>{datetime.fromtimestamp(t).strftime('%H:%M:%S')}</small>"
+            for t, s in changes
+        )
+        rows.append(
+            f"<tr><td><code>{html.escape(study_id)}</code></td>"
+            f"<td>{STATE_EMOJI.get(state, '❓')} {html.escape(str(state))}</td>"
+            f"<td>{timeline}</td></tr>"
+        )
+    return (
+        "<table><tr><th>Study ID</th><th>State</th><th>Transitions</th></tr>"
+        + "".join(rows)
+        + "</table>"
+    )
+
+
+@instrument
+async def watch_studies(ids_text):
+    """Emite los cambios de estado de uno o varios estudios hasta que terminan."""
+    study_ids = parse_task_ids(ids_text)
+    if not study_ids:
+        yield "⚠️ Enter one or more Study IDs"
+        return
+    async for history in watch(study_ids, study_store.get):
+        for study_id, changes in history.items():
+            if changes[-1][1] in TERMINAL_STATES:
+                poller.track_study(study_id, changes[-1][1])
+        yield render_watch(history)
+
+
+def resolve_task_id(text):
+    """ID completo a partir de un ID, un prefijo o un ID truncado de la tabla."""
+    task_id, matches = task_lookup.resolve(text)
+    if task_id is None and matches > 1:
+        raise ValueError(
+            f"{matches} queued tasks start with '{clean_id(text)}', type more characters"
+        )
+    # Si no está en el snapshot (p. ej. ya en ejecución) se envía tal cual
+    return task_id or clean_id(text)
+
+
+def suggestion_label(task):
+    return (
+        f"{task['task_id']} · {task.get('state', '')} · {task.get('worker', '')} · "
+        f"{str(task.get('args', ''))[:40]}"
+    )
+
+
+@instrument
+async def suggest_tasks(text):
+    """Autocompletado: IDs por prefijo y, si faltan, tareas por subcadena de args."""
+    poller.ensure_started()
+    choices = []
+    for task_id in task_lookup.suggest(text):
+        task = task_lookup.get(task_id)
+        if task is not None:
+            choices.append((suggestion_label(task), task_id))
+    return gr.update(choices=choices, value=None)
+
+
+@instrument
+async def delete_task(task_id):
     if not task_id:
         return "⚠️ Enter a Task ID"
     try:
-        r = requests.delete(f"{API_URL}/tasks/{task_id}")
+        task_id = resolve_task_id(task_id)
+        r = await api_client.gateway(task_site(task_id)).delete(
+            f"/tasks/{task_id}", deadline=api_client.WRITE_DEADLINE
+        )
         if r.status_code == 200:
+            invalidate_tasks()
             return f"✅ <b>Task Revoked</b><br>ID: <code>{task_id[:20]}...</code>"
         return f"❌ Error: {r.text}"
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
 
-def requeue_task(task_id, new_priority):
+@instrument
+async def requeue_task(task_id, new_priority):
     if not task_id:
         return "⚠️ Enter a Task ID"
     try:
-        r = requests.post(
-            f"{API_URL}/tasks/{task_id}/requeue?priority={new_priority}", timeout=15
+        task_id = resolve_task_id(task_id)
+        r = await api_client.gateway(task_site(task_id)).post(
+            f"/tasks/{task_id}/requeue",
+            params={"priority": new_priority},
+            deadline=api_client.WRITE_DEADLINE,
         )
         if r.status_code == 200:
+            invalidate_tasks()
             res = r.json()
             return f"""✅ <b>Task Requeued</b>
 
@@ -143,16 +634,252 @@ def requeue_task(task_id, new_priority):
         return f"❌ Error: {str(e)}"
 
 
-def load_stats():
-    w, t = get_all_status()
-    return w, t
+@instrument
+async def bulk_task_action(
+    ids_text,
+    use_filters,
+    action,
+    bulk_priority,
+    concurrency,
+    state,
+    worker,
+    priority,
+    text,
+    sort_key,
+    descending,
+    progress=gr.Progress(),
+):
+    """Revoca o reencola muchas tareas emitiendo el progreso en streaming."""
+    task_ids = parse_task_ids(ids_text)
+    if use_filters:
+        # Sin filtros ni texto la consulta casa con toda la cola: un clic la vaciaría
+        if (state, worker, priority) == (ALL, ALL, ALL) and not (text or "").strip():
+            yield (
+                "⚠️ Set at least one filter or a search text to apply the action "
+                "to matching tasks",
+                [],
+            )
+            return
+        index = get_task_index(await poller.current())
+        matched, _, _ = index.query(
+            {"state": state, "worker": worker, "priority": priority},
+            text,
+            sort_key,
+            descending,
+            page_size=max(len(index.tasks), 1),
+        )
+        seen = set(task_ids)
+        task_ids += [
+            t["task_id"]
+            for t in matched
+            if t.get("task_id") and t["task_id"] not in seen
+        ]
+    if not task_ids:
+        yield "⚠️ No tasks selected", []
+        return
+
+    if action == "requeue":
+
+        def call(task_id):
+            return api_client.gateway(task_site(task_id)).post(
+                f"/tasks/{task_id}/requeue",
+                params={"priority": bulk_priority},
+                deadline=api_client.WRITE_DEADLINE,
+            )
+
+    else:
+
+        def call(task_id):
+            return api_client.gateway(task_site(task_id)).delete(
+                f"/tasks/{task_id}", deadline=api_client.WRITE_DEADLINE
+            )
+
+    total, ok, rows = len(task_ids), 0, []
+    # Reencolar no es idempotente: un reintento tras un timeout la duplicaría
+    async for task_id, success, detail in run_bulk(
+        task_ids, call, concurrency, idempotent=action != "requeue"
+    ):
+        ok += success
+        rows.append([task_id, "✅" if success else "❌", detail])
+        progress((len(rows), total), desc=f"{action} {len(rows)}/{total}")
+        if len(rows) % 25 == 0 or len(rows) == total:
+            yield (
+                f"<b>{action.title()}:</b> {len(rows)}/{total} done · "
+                f"✅ {ok} · ❌ {len(rows) - ok}",
+                rows,
+            )
+
+    invalidate_tasks()
+
+
+def render_stale_banner(snapshot):
+    """Aviso visible cuando parte de los datos viene del último snapshot bueno."""
+    if not snapshot["stale"]:
+        return ""
+    parts = []
+    for name in snapshot["stale"]:
+        fetched_at = snapshot["fetched_at"][name]
+        when = (
+            datetime.fromtimestamp(fetched_at).strftime("%H:%M:%S")
+            if fetched_at
+            else "never"
+        )
+        parts.append(f"{name} (last good: {when})")
+    return (
+        '<div style="background: var(--warning-bg); color: var(--warning); '
+        'border-radius: 10px; padding: 10px 16px; margin-bottom: 12px;">'
+        f"⚠️ Gateway unhealthy, showing stale data for {', '.join(parts)}: "
+        f"{html.escape(snapshot['error'] or '')}</div>"
+    )
+
+
+def site_status(site):
+    health = federation.health[site]
+    breaker_state = api_client.gateways[site].breaker.state
+    if breaker_state != "closed":
+        return f"🔴 Circuit {breaker_state}"
+    if health["pending"]:
+        return f"🟡 Slow (> {federation.wait:g}s)"
+    if health["healthy"] is None:
+        return "⚪ Unknown"
+    return "🟢 Online" if health["healthy"] else "🔴 Error"
+
+
+def render_sites():
+    """Latencia y salud por sede; solo con varios gateways configurados."""
+    if not federation.multi_site:
+        return ""
+    rows = []
+    for site, health in federation.health.items():
+        latency = (
+            f"{health['latency'] * 1000:.0f} ms"
+            if health["latency"] is not None
+            else "–"
+        )
+        last_ok = (
+            datetime.fromtimestamp(health["fetched_at"]).strftime("%H:%M:%S")
+            if health["fetched_at"]
+            else "never"
+        )
+        rows.append(
+            f"<tr><td><b>{html.escape(site)}</b></td><td>{site_status(site)}</td>"
+            f"<td>{latency}</td><td>{last_ok}</td>"
+            f"<td>{html.escape(health['error'] or '')}</td></tr>"
+        )
+    return (
+        '<table style="width: 100%; margin-top: 12px; font-size: 13px;">'
+        "<tr><th>Site</th><th>Status</th><th>Latency</th><th>Last OK</th>"
+        "<th>Error</th></tr>" + "".join(rows) + "</table>"
+    )
 
 
-def load_workers():
-    workers = get_workers()
+def render_stats(snapshot):
+    workers = len(snapshot["workers"])
+    tasks = len(snapshot["tasks"].get("queued_tasks", []))
+    completed = sum(1 for s in snapshot["studies"].values() if s == "SUCCESS")
+    open_sites = [
+        site for site, gw in api_client.gateways.items() if gw.breaker.state != "closed"
+    ]
+    degraded_sites = [
+        site
+        for site, health in federation.health.items()
+        if health["pending"] or health["healthy"] is False
+    ]
+    if len(open_sites) == len(api_client.gateways):
+        status = "Circuit open"
+    elif snapshot["updated_at"] is None:
+        status = "Offline"
+    elif snapshot["healthy"] and not open_sites and not degraded_sites:
+        status = "Online"
+    else:
+        status = "Degraded"
+    return render_stale_banner(snapshot) + f"""
+            <div class="stats-row" style="width: 100%;">
+                <div class="stat-card">
+                    <div class="stat-icon" style="background: rgba(99, 102, 241, 0.15);">👥</div>
+                    <div class="stat-value" id="workers-count">{workers}</div>
+                    <div class="stat-label">Active Workers</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-icon" style="background: rgba(245, 158, 11, 0.15);">📋</div>
+                    <div class="stat-value" id="tasks-count">{tasks}</div>
+                    <div class="stat-label">Queued Tasks</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-icon" style="background: rgba(16, 185, 129, 0.15);">✅</div>
+                    <div class="stat-value" id="completed-count">{completed}</div>
+                    <div class="stat-label">Completed Studies</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-icon" style="background: rgba(59, 130, 246, 0.15);">⚡</div>
+                    <div class="stat-value">{status}</div>
+                    <div class="stat-label">System Status</div>
+                </div>
+            </div>
+        """ + render_sites()
+
+
+def history_frame(range_label, prefixes):
+    rows = history.query(HISTORY_RANGES.get(range_label, 900), prefixes)
+    df = pd.DataFrame(rows, columns=["time", "series", "value"])
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df
+
+
+@instrument
+async def load_history_charts(range_label):
+    poller.ensure_started()
+    loop = asyncio.get_running_loop()
+    return tuple(
+        await asyncio.gather(
+            loop.run_in_executor(
+                history_thread, history_frame, range_label, ("workers", "queue.")
+            ),
+            loop.run_in_executor(
+                history_thread, history_frame, range_label, ("state.",)
+            ),
+        )
+    )
+
+
+@instrument
+async def load_stats():
+    return render_stats(await poller.current())
+
+
+async def load_workers():
+    workers = await get_workers()
     return workers if workers else []
 
 
+def cache_stats_html():
+    s = api_cache.stats()
+    return (
+        '<div style="color: var(--text-muted); font-size: 12px;">'
+        f"Cache: {s['hits']} hits · {s['stale_hits']} stale · {s['misses']} misses · "
+        f"{s['upstream_calls']} upstream calls · {s['hit_ratio']:.0%} hit ratio</div>"
+    )
+
+
+@instrument
+async def load_dashboard():
+    """Carga inicial: todo sale del snapshot compartido del poller."""
+    snapshot = await poller.current()
+    workers = snapshot["workers"]
+    tasks, total, page, pages = query_task_page(
+        snapshot, ALL, ALL, ALL, "", "task_id", False, 1
+    )
+    return (
+        render_stats(snapshot),
+        build_workers_rows(workers),
+        workers if workers else [],
+        build_tasks_rows(tasks),
+        page_info_html(page, pages, total, snapshot),
+        *task_filter_choices(snapshot),
+        cache_stats_html(),
+    )
+
+
 css = """
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
 
@@ -415,37 +1142,11 @@ with gr.Blocks(css=css) as demo:
         </div>
     """)
 
-    # Stats que se cargan dinámicamente
+    # Stats que se rellenan desde el snapshot del poller
     with gr.Row():
-        gr.HTML("""
-            <div class="stats-row" style="width: 100%;">
-                <div class="stat-card">
-                    <div class="stat-icon" style="background: rgba(99, 102, 241, 0.15);">👥</div>
-                    <div class="stat-value" id="workers-count">-</div>
-                    <div class="stat-label">Active Workers</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-icon" style="background: rgba(245, 158, 11, 0.15);">📋</div>
-                    <div class="stat-value" id="tasks-count">-</div>
-                    <div class="stat-label">Queued Tasks</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-icon" style="background: rgba(16, 185, 129, 0.15);">✅</div>
-                    <div class="stat-value">0</div>
-                    <div class="stat-label">Completed Studies</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-icon" style="background: rgba(59, 130, 246, 0.15);">⚡</div>
-                    <div class="stat-value">Online</div>
-                    <div class="stat-label">System Status</div>
-                </div>
-            </div>
-        """)
-
-    # Cargar stats al inicio
-    demo.load(
-        fn=load_stats, outputs=[gr.Number(visible=False), gr.Number(visible=False)]
-    )
+        stats_html = gr.HTML(render_stats(poller.snapshot))
+    stats_timer = gr.Timer(POLL_INTERVAL)
+    stats_timer.tick(fn=load_stats, outputs=stats_html)
 
     with gr.Tabs():
         with gr.Tab("📊 Dashboard", id="dashboard"):
@@ -458,12 +1159,33 @@ with gr.Blocks(css=css) as demo:
                         <button class="btn-secondary" onclick="document.querySelectorAll('.tab-nav button')[3].click()">📋 Manage Tasks</button>
                     </div>
                 """)
-            gr.HTML("""
-                <div class="section-title" style="margin-top: 24px;">Recent Activity</div>
-                <div style="background: var(--bg-card); border: 1px solid var(--border); border-radius: 12px; padding: 20px; color: var(--text-muted);">
-                    <p>No recent activity. Launch a study to see results here.</p>
-                </div>
-            """)
+            gr.HTML(
+                '<div class="section-title" style="margin-top: 24px;">Recent Activity</div>'
+            )
+            history_range = gr.Radio(
+                choices=list(HISTORY_RANGES), value="15 min", label="Range"
+            )
+            with gr.Row():
+                queue_plot = gr.LinePlot(
+                    x="time",
+                    y="value",
+                    color="series",
+                    title="Workers & Queue Depth",
+                )
+                state_plot = gr.LinePlot(
+                    x="time",
+                    y="value",
+                    color="series",
+                    title="Queued Tasks by State",
+                )
+            history_timer = gr.Timer(60)
+            for trigger in [history_range.change, history_timer.tick, demo.load]:
+                trigger(
+                    fn=load_history_charts,
+                    inputs=history_range,
+                    outputs=[queue_plot, state_plot],
+                )
+            cache_stats = gr.HTML()
 
         with gr.Tab("👥 Workers", id="workers"):
             gr.HTML('<div class="section-title">Active Private Workers</div>')
@@ -475,8 +1197,6 @@ with gr.Blocks(css=css) as demo:
                     "🔄 Refresh Workers", variant="secondary"
                 )
 
-            # Cargar al inicio y al hacer click
-            demo.load(fn=refresh_workers_table, outputs=workers_table)
             btn_refresh_workers.click(fn=refresh_workers_table, outputs=workers_table)
 
         with gr.Tab("➕ New Study", id="new-study"):
@@ -510,6 +1230,14 @@ with gr.Blocks(css=css) as demo:
                         visible=False,
                     )
 
+                    # En modo privado la sede la da el worker ("sede/worker")
+                    site_dropdown = gr.Dropdown(
+                        choices=federation.sites,
+                        value=federation.sites[0],
+                        label="Site (Public Mode)",
+                        visible=federation.multi_site,
+                    )
+
                     btn_start = gr.Button(
                         "🚀 Launch Study", variant="primary", size="lg"
                     )
@@ -518,55 +1246,172 @@ with gr.Blocks(css=css) as demo:
                     gr.HTML('<div class="section-title">Response</div>')
                     output_start = gr.HTML()
 
-            # Cargar workers al iniciar
-            demo.load(fn=load_workers, outputs=workers_state)
-
             def toggle_mode(mode, workers):
                 if mode == "public":
-                    return gr.update(visible=True), gr.update(visible=False), workers
+                    return (
+                        gr.update(visible=True),
+                        gr.update(visible=False),
+                        gr.update(visible=federation.multi_site),
+                        workers,
+                    )
                 return (
                     gr.update(visible=False),
                     gr.update(visible=True, choices=workers if workers else []),
+                    gr.update(visible=False),
                     workers,
                 )
 
             mode_radio.change(
                 toggle_mode,
                 inputs=[mode_radio, workers_state],
-                outputs=[priority_dropdown, worker_dropdown, workers_state],
+                outputs=[
+                    priority_dropdown,
+                    worker_dropdown,
+                    site_dropdown,
+                    workers_state,
+                ],
             )
             btn_start.click(
                 fn=start_training,
-                inputs=[yaml_input, mode_radio, priority_dropdown, worker_dropdown],
+                inputs=[
+                    yaml_input,
+                    mode_radio,
+                    priority_dropdown,
+                    worker_dropdown,
+                    site_dropdown,
+                ],
                 outputs=output_start,
             )
 
+            gr.HTML(
+                '<div class="section-title" style="margin-top: 24px;">Batch Launch</div>'
+            )
+            with gr.Row():
+                with gr.Column(scale=1):
+                    batch_files = gr.File(
+                        label="📄 YAML configs or .zip",
+                        file_count="multiple",
+                        file_types=[".yaml", ".yml", ".zip"],
+                    )
+                    batch_dir = gr.File(
+                        label="📁 Directory (its config_train*.yaml files)",
+                        file_count="directory",
+                    )
+                    batch_base = gr.File(
+                        label="📄 Base config for grid (optional)",
+                        file_types=[".yaml", ".yml"],
+                    )
+                    batch_grid = gr.Textbox(
+                        label="Grid",
+                        placeholder="train.imgsz=320,416,640; sweeper.n_trials=10,20",
+                        lines=2,
+                    )
+                    with gr.Row():
+                        batch_concurrency = gr.Slider(
+                            1, 32, value=BATCH_CONCURRENCY, step=1, label="Concurrency"
+                        )
+                        batch_rate = gr.Number(
+                            value=BATCH_RATE, label="Max submissions / s"
+                        )
+                    btn_batch = gr.Button("🚀 Launch Batch", variant="primary")
+                with gr.Column(scale=1):
+                    batch_output = gr.HTML()
+                    batch_results = gr.Dataframe(
+                        headers=["Config", "Study ID", "Result"],
+                        datatype=["str", "str", "str"],
+                        max_height=350,
+                    )
+
+            btn_batch.click(
+                fn=launch_batch,
+                inputs=[
+                    batch_files,
+                    batch_dir,
+                    batch_base,
+                    batch_grid,
+                    mode_radio,
+                    priority_dropdown,
+                    worker_dropdown,
+                    batch_concurrency,
+                    batch_rate,
+                    site_dropdown,
+                ],
+                outputs=[batch_output, batch_results],
+            )
+
         with gr.Tab("🔍 Monitor", id="monitor"):
             gr.HTML('<div class="section-title">Check Study Status</div>')
             with gr.Row():
                 study_id_input = gr.Textbox(placeholder="Enter study ID...", scale=4)
                 btn_check_status = gr.Button("🔍 Check Status", variant="primary")
+            btn_full_result = gr.Button("📄 Load Full Result", variant="secondary")
             status_output = gr.HTML()
             btn_check_status.click(
                 fn=check_status, inputs=study_id_input, outputs=status_output
             )
+            btn_full_result.click(
+                fn=load_full_result, inputs=study_id_input, outputs=status_output
+            )
+
+            gr.HTML(
+                '<div class="section-title" style="margin-top: 24px;">Watch Studies</div>'
+            )
+            with gr.Row():
+                watch_ids_input = gr.Textbox(
+                    placeholder="One or more study IDs, comma or newline separated...",
+                    lines=2,
+                    scale=4,
+                )
+                with gr.Column(scale=1):
+                    btn_watch = gr.Button("👁️ Watch", variant="primary")
+                    btn_stop_watch = gr.Button("⏹️ Stop", variant="secondary")
+            watch_output = gr.HTML()
+            watch_event = btn_watch.click(
+                fn=watch_studies, inputs=watch_ids_input, outputs=watch_output
+            )
+            btn_stop_watch.click(fn=None, cancels=[watch_event])
 
         with gr.Tab("📋 Tasks", id="tasks"):
             gr.HTML('<div class="section-title">Queued Tasks</div>')
+            with gr.Row():
+                state_filter = gr.Dropdown(choices=[ALL], value=ALL, label="State")
+                worker_filter = gr.Dropdown(choices=[ALL], value=ALL, label="Worker")
+                priority_filter = gr.Dropdown(
+                    choices=[ALL], value=ALL, label="Priority"
+                )
+                args_search = gr.Textbox(placeholder="Search args...", label="Args")
+                sort_dropdown = gr.Dropdown(
+                    choices=SORT_KEYS, value="task_id", label="Sort by"
+                )
+                sort_desc = gr.Checkbox(label="Descending", value=False)
             tasks_table = gr.Dataframe(
-                headers=["Task ID", "State", "Worker", "Args"],
-                datatype=["str", "str", "str", "str"],
+                headers=["Task ID", "State", "Worker", "Priority", "Args"],
+                datatype=["str", "str", "str", "str", "str"],
                 max_height=250,
             )
             with gr.Row():
+                btn_prev_page = gr.Button("◀ Prev", variant="secondary")
+                page_number = gr.Number(value=1, precision=0, label="Page")
+                btn_next_page = gr.Button("Next ▶", variant="secondary")
                 btn_refresh_tasks = gr.Button("🔄 Refresh", variant="secondary")
+                live_toggle = gr.Checkbox(label="🔴 Live", value=False)
+            page_info = gr.HTML()
+            tasks_delta = gr.HTML()
+            tasks_live_state = gr.State(None)
+            tasks_timer = gr.Timer(POLL_INTERVAL, active=False)
 
             gr.HTML(
                 '<div class="section-title" style="margin-top: 24px;">Task Actions</div>'
             )
             with gr.Row():
                 with gr.Column(scale=2):
-                    task_id_input = gr.Textbox(placeholder="Task ID...")
+                    task_id_input = gr.Textbox(
+                        placeholder="Task ID, ID prefix or args...",
+                        label="Task",
+                    )
+                    task_suggestions = gr.Dropdown(
+                        choices=[], label="Matching tasks", interactive=True
+                    )
                 with gr.Column(scale=1):
                     new_priority = gr.Dropdown(
                         choices=["high", "medium", "low"],
@@ -580,9 +1425,91 @@ with gr.Blocks(css=css) as demo:
 
             manage_output = gr.HTML()
 
-            # Cargar al inicio
-            demo.load(fn=refresh_tasks_table, outputs=tasks_table)
-            btn_refresh_tasks.click(fn=refresh_tasks_table, outputs=tasks_table)
+            gr.HTML(
+                '<div class="section-title" style="margin-top: 24px;">Bulk Actions</div>'
+            )
+            with gr.Row():
+                with gr.Column(scale=2):
+                    bulk_ids = gr.Textbox(
+                        placeholder="Task IDs, one per line or comma separated...",
+                        lines=4,
+                        label="Task IDs",
+                    )
+                with gr.Column(scale=1):
+                    bulk_use_filters = gr.Checkbox(
+                        label="Also apply to all tasks matching the current filters",
+                        info="Requires at least one filter or a search text",
+                        value=False,
+                    )
+                    bulk_action = gr.Radio(
+                        choices=["revoke", "requeue"], value="revoke", label="Action"
+                    )
+                    bulk_priority = gr.Dropdown(
+                        choices=["high", "medium", "low"],
+                        value="medium",
+                        label="Requeue Priority",
+                    )
+                    bulk_concurrency = gr.Slider(
+                        1, 64, value=BULK_CONCURRENCY, step=1, label="Concurrency"
+                    )
+                    btn_bulk = gr.Button("⚡ Run Bulk Action", variant="primary")
+            bulk_output = gr.HTML()
+            bulk_results = gr.Dataframe(
+                headers=["Task ID", "Result", "Detail"],
+                datatype=["str", "str", "str"],
+                max_height=250,
+            )
+
+            task_query = [
+                state_filter,
+                worker_filter,
+                priority_filter,
+                args_search,
+                sort_dropdown,
+                sort_desc,
+                page_number,
+            ]
+            task_page = [tasks_table, page_info, page_number]
+            btn_refresh_tasks.click(
+                fn=refresh_tasks_table, inputs=task_query, outputs=task_page
+            ).then(
+                fn=refresh_task_filters,
+                outputs=[state_filter, worker_filter, priority_filter],
+            )
+            for control in [
+                state_filter,
+                worker_filter,
+                priority_filter,
+                sort_dropdown,
+            ]:
+                control.input(fn=first_task_page, inputs=task_query, outputs=task_page)
+            sort_desc.input(fn=first_task_page, inputs=task_query, outputs=task_page)
+            args_search.submit(fn=first_task_page, inputs=task_query, outputs=task_page)
+            page_number.submit(
+                fn=refresh_tasks_table, inputs=task_query, outputs=task_page
+            )
+            btn_bulk.click(
+                fn=bulk_task_action,
+                inputs=[
+                    bulk_ids,
+                    bulk_use_filters,
+                    bulk_action,
+                    bulk_priority,
+                    bulk_concurrency,
+                ]
+                + task_query[:-1],
+                outputs=[bulk_output, bulk_results],
+            )
+            btn_prev_page.click(fn=prev_task_page, inputs=task_query, outputs=task_page)
+            btn_next_page.click(fn=next_task_page, inputs=task_query, outputs=task_page)
+            live_toggle.change(
+                lambda on: gr.Timer(active=on), inputs=live_toggle, outputs=tasks_timer
+            )
+            tasks_timer.tick(
+                fn=live_tasks_tick,
+                inputs=task_query + [tasks_live_state],
+                outputs=[tasks_table, tasks_delta, tasks_live_state],
+            )
             btn_requeue.click(
                 fn=requeue_task,
                 inputs=[task_id_input, new_priority],
@@ -591,6 +1518,35 @@ with gr.Blocks(css=css) as demo:
             btn_delete.click(
                 fn=delete_task, inputs=task_id_input, outputs=manage_output
             )
+            task_id_input.input(
+                fn=suggest_tasks,
+                inputs=task_id_input,
+                outputs=task_suggestions,
+                trigger_mode="always_last",
+                show_progress="hidden",
+            )
+            task_suggestions.input(
+                fn=lambda task_id: task_id or gr.skip(),
+                inputs=task_suggestions,
+                outputs=task_id_input,
+                show_progress="hidden",
+            )
+
+    # Cargar todo al inicio en una sola ráfaga concurrente
+    demo.load(
+        fn=load_dashboard,
+        outputs=[
+            stats_html,
+            workers_table,
+            workers_state,
+            tasks_table,
+            page_info,
+            state_filter,
+            worker_filter,
+            priority_filter,
+            cache_stats,
+        ],
+    )
 
     gr.HTML("""
         <div class="footer">
@@ -599,6 +1555,7 @@ with gr.Blocks(css=css) as demo:
     """)
 
 if __name__ == "__main__":
+    start_metrics_server()
     demo.launch(
         server_name="0.0.0.0", server_port=7860, inbrowser=True, show_error=True
     )
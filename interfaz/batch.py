@@ -0,0 +1,150 @@
+"""Lanzamiento por lotes de estudios a partir de muchos YAML o de un grid.
+
+Acepta ficheros ``.yaml``/``.yml`` sueltos, directorios y ``.zip`` con
+configuraciones, o una configuración base más un grid sobre claves con puntos
+(``train.imgsz=320,640; sweeper.n_trials=10,20``). Los envíos se hacen en
+paralelo con límite de concurrencia y de tasa.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+import zipfile
+
+import yaml
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_RATE = float(os.getenv("BATCH_RATE", "5"))
+YAML_EXTENSIONS = (".yaml", ".yml")
+CONFIG_PREFIX = "config_train"
+
+
+def is_train_config(name):
+    base = os.path.basename(name)
+    return base.startswith(CONFIG_PREFIX) and base.endswith(YAML_EXTENSIONS)
+
+
+def load_configs(paths):
+    """Devuelve ``[(nombre, contenido_bytes)]`` de ficheros, directorios y zips.
+
+    Dentro de directorios y zips solo se recogen los ``config_train*.yaml``,
+    para no enviar ``data.yaml`` ni los ``args.yaml`` de los reportes.
+    """
+    configs = []
+    for path in paths or []:
+        path = getattr(path, "name", path)
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if is_train_config(name):
+                        full = os.path.join(root, name)
+                        with open(full, "rb") as f:
+                            configs.append((os.path.relpath(full, path), f.read()))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for name in sorted(zf.namelist()):
+                    if is_train_config(name) and not name.startswith("__MACOSX"):
+                        configs.append((name, zf.read(name)))
+        elif path.endswith(YAML_EXTENSIONS):
+            with open(path, "rb") as f:
+                configs.append((os.path.basename(path), f.read()))
+    return configs
+
+
+def load_directory_upload(paths):
+    """``[(nombre, contenido_bytes)]`` de una carpeta subida desde el navegador.
+
+    El navegador manda la carpeta como ficheros sueltos, así que el filtro de
+    ``config_train*.yaml`` se aplica aquí a cada uno.
+    """
+    configs = []
+    for path in paths or []:
+        path = getattr(path, "name", path)
+        if is_train_config(os.path.basename(path)):
+            with open(path, "rb") as f:
+                configs.append((os.path.basename(path), f.read()))
+    return configs
+
+
+def parse_grid(text):
+    """``"train.imgsz=320,640; sweeper.n_trials=10"`` -> ``{clave: [valores]}``."""
+    grid = {}
+    for part in (text or "").replace("\n", ";").split(";"):
+        if "=" not in part:
+            continue
+        key, values = part.split("=", 1)
+        grid[key.strip()] = [
+            yaml.safe_load(v.strip()) for v in values.split(",") if v.strip()
+        ]
+    return grid
+
+
+def set_dotted(config, key, value):
+    node = config
+    *parents, leaf = key.split(".")
+    for parent in parents:
+        node = node.setdefault(parent, {})
+    node[leaf] = value
+
+
+def expand_grid(base_name, base_content, grid):
+    """Producto cartesiano del grid sobre la configuración base.
+
+    Cada combinación recibe un ``sweeper.study_name`` propio para que Optuna no
+    mezcle los trials de estudios distintos en el mismo estudio.
+    """
+    if not grid:
+        return [(base_name, base_content)]
+    stem = os.path.splitext(os.path.basename(base_name))[0]
+    keys = list(grid)
+    configs = []
+    for combo in itertools.product(*(grid[k] for k in keys)):
+        config = yaml.safe_load(base_content) or {}
+        suffix = "__".join(f"{k.split('.')[-1]}-{v}" for k, v in zip(keys, combo))
+        for key, value in zip(keys, combo):
+            set_dotted(config, key, value)
+        sweeper = config.get("sweeper")
+        if isinstance(sweeper, dict) and sweeper.get("study_name"):
+            sweeper["study_name"] = f"{sweeper['study_name']}__{suffix}"
+        content = yaml.safe_dump(config, sort_keys=False).encode()
+        configs.append((f"{stem}__{suffix}.yaml", content))
+    return configs
+
+
+class RateLimiter:
+    """Espacia las llamadas para no superar ``rate`` por segundo."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def submit_batch(configs, submit, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+    """Envía cada ``(nombre, contenido)`` con ``submit`` y produce resultados al llegar.
+
+    Produce ``(nombre, respuesta_o_None, error_o_None)``. ``POST /train`` no es
+    idempotente, así que aquí no se reintenta.
+    """
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+    limiter = RateLimiter(rate)
+
+    async def one(name, content):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                return name, await submit(name, content), None
+            except Exception as e:
+                return name, None, str(e) or type(e).__name__
+
+    for future in asyncio.as_completed([one(n, c) for n, c in configs]):
+        yield await future
@@ -0,0 +1,313 @@
+"""Benchmarks del dashboard contra un gateway sintético local.
+
+Levanta un gateway falso (stdlib, en un hilo) que simula N workers, M tareas
+encoladas, resultados de estudio grandes y latencia inyectada, y mide para
+cada tamaño de cluster los callbacks reales de ``app``:
+
+- latencia por callback (p50/p95/max sobre varias repeticiones),
+- pico de memoria durante una llamada (tracemalloc),
+- tamaño serializado de lo que el callback devuelve a Gradio.
+
+Los resultados se guardan como JSON en ``BENCH_DIR`` y se comparan con la
+ejecución anterior; cualquier métrica que empeore más que ``--threshold``
+se marca como regresión y el proceso sale con código 1.
+
+Ejemplos:
+    python bench.py                          # 10, 1k, 100k y 1M tareas
+    python bench.py --sizes 10 1000 --latency 0.02 --result-kb 512
+    python bench.py --baseline bench_results/20250101-120000.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.getenv("BENCH_DIR", "bench_results")
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+STATES = ["PENDING", "PENDING", "PENDING", "STARTED", "RETRY"]
+PRIORITIES = ["1", "5", "10"]
+
+
+class FakeCluster:
+    """Estado del gateway falso; los cuerpos JSON se serializan una sola vez."""
+
+    def __init__(self, workers=4, tasks=10, result_kb=64, latency=0.0, seed=0):
+        rng = random.Random(seed)
+        names = [f"gpus_{i:03d}" for i in range(workers)]
+        self.latency = latency
+        self.workers_body = json.dumps(names).encode()
+        self.tasks_body = json.dumps(
+            {
+                "queued_tasks": [
+                    {
+                        "task_id": str(uuid.UUID(int=rng.getrandbits(128))),
+                        "state": rng.choice(STATES),
+                        "worker": rng.choice(names),
+                        "priority": rng.choice(PRIORITIES),
+                        "args": f"['config_train_{i}.yaml', 'user_{i % 97}']",
+                    }
+                    for i in range(tasks)
+                ]
+            }
+        ).encode()
+        # Resultado de estudio con ~result_kb KB de métricas por época
+        epochs = max(1, result_kb * 1024 // 120)
+        self.status_body = json.dumps(
+            {
+                "state": "STARTED",
+                "result": {
+                    "metrics": [
+                        {"epoch": e, "map50": rng.random(), "loss": rng.random()}
+                        for e in range(epochs)
+                    ]
+                },
+            }
+        ).encode()
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    cluster = FakeCluster()
+
+    def do_GET(self):
+        time.sleep(self.cluster.latency)
+        path = self.path.split("?")[0].rstrip("/")
+        status, body = 200, None
+        if path == "/workers":
+            body = self.cluster.workers_body
+        elif path == "/tasks":
+            body = self.cluster.tasks_body
+        elif path.startswith("/status/"):
+            body = self.cluster.status_body
+        else:
+            status, body = 404, b'{"detail": "Not Found"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_gateway():
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGatewayHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def payload_bytes(value):
+    """Tamaño aproximado de lo que Gradio envía al navegador."""
+    return len(json.dumps(value, default=str).encode())
+
+
+async def measure(name, call, repeat, reset=None):
+    """Ejecuta ``call`` ``repeat`` veces; ``reset`` se llama antes de cada una."""
+    times = []
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        result = await call()
+        times.append(time.perf_counter() - start)
+    if reset is not None:
+        reset()
+    tracemalloc.start()
+    result = await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "callback": name,
+        "p50_ms": statistics.median(times) * 1000,
+        "p95_ms": sorted(times)[max(0, int(len(times) * 0.95) - 1)] * 1000,
+        "max_ms": max(times) * 1000,
+        "peak_kb": peak / 1024,
+        "payload_bytes": payload_bytes(result),
+    }
+
+
+async def run_size(app, args, n_tasks):
+    FakeGatewayHandler.cluster = FakeCluster(
+        workers=args.workers,
+        tasks=n_tasks,
+        result_kb=args.result_kb,
+        latency=args.latency,
+    )
+    # Snapshot nuevo con el tamaño actual antes de medir los callbacks
+    app.api_cache.invalidate()
+    snapshot = await app.poller.refresh()
+    assert len(snapshot["tasks"]["queued_tasks"]) == n_tasks, snapshot["error"]
+    study_id = str(uuid.uuid4())
+
+    def cold_snapshot():
+        app.api_cache.invalidate()
+
+    async def poll():
+        cold_snapshot()
+        return (await app.poller.refresh())["tasks"]
+
+    results = [
+        await measure("poller.refresh", poll, args.repeat),
+        await measure("refresh_workers_table", app.refresh_workers_table, args.repeat),
+        await measure("refresh_tasks_table", app.refresh_tasks_table, args.repeat),
+        await measure(
+            "refresh_tasks_table[filtered]",
+            lambda: app.refresh_tasks_table(
+                "PENDING", app.ALL, "5", "user_1", "worker", True, 3
+            ),
+            args.repeat,
+        ),
+        await measure(
+            "check_status",
+            lambda: app.check_status(study_id),
+            args.repeat,
+            reset=cold_snapshot,
+        ),
+        await measure(
+            "load_full_result", lambda: app.load_full_result(study_id), args.repeat
+        ),
+        await measure("load_dashboard", app.load_dashboard, args.repeat),
+    ]
+    for r in results:
+        r["tasks"] = n_tasks
+    return results
+
+
+def load_app():
+    """Importa ``app`` apuntando al gateway falso y sin efectos laterales."""
+    server = start_fake_gateway()
+    os.environ["API_URL"] = f"http://127.0.0.1:{server.server_port}"
+    # Con 1M de tareas /tasks pesa >100 MB: el deadline de lectura no aplica
+    os.environ.setdefault("READ_DEADLINE", "600")
+    os.environ.setdefault("API_TIMEOUT", "600")
+    # Sin poller periódico: cada medición fuerza su propio refresh
+    os.environ.setdefault("POLL_INTERVAL", "86400")
+    os.environ.setdefault("REDIS_URL", "")
+    os.environ["HISTORY_DB"] = os.path.join(tempfile.mkdtemp(), "history.sqlite")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+
+    return app
+
+
+def find_regressions(current, baseline, threshold):
+    """Compara por (callback, tareas); solo latencia p50, memoria y payload."""
+    previous = {(r["callback"], r["tasks"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = previous.get((r["callback"], r["tasks"]))
+        if old is None:
+            continue
+        for metric in ("p50_ms", "peak_kb", "payload_bytes"):
+            # Suelos para no marcar ruido en valores diminutos
+            floor = {"p50_ms": 1.0, "peak_kb": 64, "payload_bytes": 1024}[metric]
+            if r[metric] > max(old[metric], floor) * threshold:
+                regressions.append(
+                    {
+                        "callback": r["callback"],
+                        "tasks": r["tasks"],
+                        "metric": metric,
+                        "baseline": old[metric],
+                        "current": r[metric],
+                        "ratio": r[metric] / max(old[metric], 1e-9),
+                    }
+                )
+    return regressions
+
+
+def latest_result(directory):
+    files = sorted(glob.glob(os.path.join(directory, "*.json")))
+    if not files:
+        return None
+    with open(files[-1]) as f:
+        return json.load(f)
+
+
+def print_table(results):
+    print(
+        f"{'callback':32}{'tasks':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'peak KB':>11}{'payload':>12}"
+    )
+    for r in results:
+        print(
+            f"{r['callback']:32}{r['tasks']:>9}{r['p50_ms']:>10.2f}"
+            f"{r['p95_ms']:>10.2f}{r['peak_kb']:>11.0f}{r['payload_bytes']:>12}"
+        )
+
+
+async def main(args):
+    app = load_app()
+    results = []
+    for n_tasks in args.sizes:
+        print(f"· {n_tasks} tasks", file=sys.stderr)
+        results.extend(await run_size(app, args, n_tasks))
+    await app.api_client.aclose()
+    return results
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Dashboard benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--result-kb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-dir", default=BENCH_DIR)
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        baseline = latest_result(args.output_dir)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {
+            "workers": args.workers,
+            "result_kb": args.result_kb,
+            "latency": args.latency,
+            "repeat": args.repeat,
+        },
+        "results": asyncio.run(main(args)),
+    }
+    print_table(report["results"])
+
+    regressions = []
+    if baseline is not None:
+        if baseline.get("params") != report["params"]:
+            print("⚠️ Baseline was run with different parameters", file=sys.stderr)
+        regressions = find_regressions(report, baseline, args.threshold)
+        report["baseline"] = baseline["created_at"]
+    report["regressions"] = regressions
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+
+    for r in regressions:
+        print(
+            f"❌ REGRESSION {r['callback']} @ {r['tasks']} tasks: {r['metric']} "
+            f"{r['baseline']:.1f} -> {r['current']:.1f} (x{r['ratio']:.2f})"
+        )
+    sys.exit(1 if regressions else 0)
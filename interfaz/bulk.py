@@ -0,0 +1,60 @@
+"""Ejecución de acciones masivas (revocar / reencolar) sobre muchas tareas.
+
+Las llamadas se lanzan con un límite de concurrencia y los resultados se
+entregan según van terminando para poder mostrar el progreso en streaming.
+Solo las acciones idempotentes (revocar) se reintentan con backoff exponencial
+ante errores de red o 5xx: un reencolado que agota el timeout puede haber
+llegado al gateway, y repetirlo duplicaría la tarea (igual que ``POST /train``
+en ``batch``).
+"""
+
+import asyncio
+import os
+
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_RETRIES = int(os.getenv("BULK_RETRIES", "2"))
+BULK_BACKOFF = float(os.getenv("BULK_BACKOFF", "0.5"))
+
+
+def parse_task_ids(text):
+    """Extrae IDs de un texto separado por saltos de línea, comas o espacios."""
+    seen = {}
+    for token in (text or "").replace(",", " ").split():
+        seen.setdefault(token.strip(), None)
+    return [t for t in seen if t]
+
+
+async def run_bulk(
+    task_ids,
+    call,
+    concurrency=BULK_CONCURRENCY,
+    retries=BULK_RETRIES,
+    idempotent=True,
+):
+    """Ejecuta ``call(task_id)`` para cada ID y produce ``(task_id, ok, detalle)``.
+
+    ``call`` debe devolver una respuesta httpx; los 4xx no se reintentan y con
+    ``idempotent=False`` no se reintenta nada: un solo intento por tarea.
+    """
+    retries = retries if idempotent else 0
+    semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+    async def one(task_id):
+        async with semaphore:
+            error = None
+            for attempt in range(retries + 1):
+                try:
+                    r = await call(task_id)
+                    if r.status_code == 200:
+                        return task_id, True, "OK"
+                    error = f"HTTP {r.status_code}: {r.text[:120]}"
+                    if r.status_code < 500:
+                        break
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                if attempt < retries:
+                    await asyncio.sleep(BULK_BACKOFF * 2**attempt)
+            return task_id, False, error
+
+    for future in asyncio.as_completed([one(t) for t in task_ids]):
+        yield await future
@@ -0,0 +1,75 @@
+"""Caché TTL con stale-while-revalidate y coalescencia single-flight.
+
+Las sesiones que piden la misma clave a la vez comparten una única petición
+al gateway; pasado el TTL el valor se sigue sirviendo (stale) mientras se
+refresca en segundo plano, hasta que supera ``ttl + stale_ttl``.
+"""
+
+import asyncio
+import os
+import time
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "5"))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "30"))
+
+
+class TTLCache:
+    def __init__(self, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    async def get(self, key, loader):
+        """Devuelve el valor de ``key`` y llama a ``loader()`` solo si hace falta."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, loader)
+                return value
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key, loader):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            # Evita el aviso "exception was never retrieved" en refrescos en 2º plano
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key, loader):
+        self.upstream_calls += 1
+        try:
+            value = await loader()
+            self._entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+            "hit_ratio": (self.hits + self.stale_hits) / total if total else 0.0,
+        }
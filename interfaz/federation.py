@@ -0,0 +1,146 @@
+"""Vista federada de varios gateways NeuralForgeAI (uno por sede).
+
+Cada recurso (workers, tareas) se pide a todas las sedes a la vez. Se espera
+como mucho ``FEDERATION_WAIT`` segundos: una sede lenta no retrasa al resto,
+su petición sigue en segundo plano y mientras tanto se usa su último valor
+bueno. Con varias sedes los workers se etiquetan como ``"sede/worker"`` y cada
+tarea lleva su ``site`` para enrutar las acciones al gateway correcto; con una
+sola sede los datos pasan sin tocar.
+"""
+
+import asyncio
+import os
+import time
+
+FEDERATION_WAIT = float(os.getenv("FEDERATION_WAIT", "2"))
+SITE_SEP = "/"
+
+
+def qualify(site, name):
+    return f"{site}{SITE_SEP}{name}"
+
+
+def split_qualified(name, sites):
+    """``"mad/gpus_a"`` -> ``("mad", "gpus_a")``; sin sede conocida -> ``(None, name)``."""
+    site, sep, rest = (name or "").partition(SITE_SEP)
+    if sep and site in sites:
+        return site, rest
+    return None, name
+
+
+class Federation:
+    def __init__(self, sites, wait=FEDERATION_WAIT):
+        self.sites = list(sites)
+        # Con una sola sede no hay nadie a quien no retrasar: se espera siempre
+        self.wait = wait if len(self.sites) > 1 else None
+        self.health = {
+            site: {
+                "healthy": None,
+                "latency": None,
+                "fetched_at": None,
+                "error": None,
+                "pending": False,
+            }
+            for site in self.sites
+        }
+        self._values = {}
+        self._inflight = {}
+        self._merged = {}
+
+    @property
+    def multi_site(self):
+        return len(self.sites) > 1
+
+    async def gather(self, resource, loader):
+        """``{sede: valor}`` con lo que haya llegado dentro de ``wait``.
+
+        Lanza la primera excepción si ninguna sede tiene todavía un valor.
+        """
+        tasks = {}
+        for site in self.sites:
+            task = self._inflight.get((resource, site))
+            if task is None:
+                task = asyncio.ensure_future(self._load(resource, site, loader))
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._inflight[(resource, site)] = task
+            tasks[site] = task
+        await asyncio.wait(tasks.values(), timeout=self.wait)
+        for site, task in tasks.items():
+            self.health[site]["pending"] = not task.done()
+
+        values = {
+            site: self._values[(resource, site)]
+            for site in self.sites
+            if (resource, site) in self._values
+        }
+        if not values:
+            for task in tasks.values():
+                if task.done() and task.exception() is not None:
+                    raise task.exception()
+            raise TimeoutError(f"no site answered {resource} in {self.wait}s")
+        return values
+
+    async def _load(self, resource, site, loader):
+        health = self.health[site]
+        start = time.monotonic()
+        try:
+            value = await loader(site)
+        except Exception as e:
+            health["healthy"] = False
+            health["error"] = f"{type(e).__name__}: {e}"
+            raise
+        else:
+            self._values[(resource, site)] = value
+            health["healthy"] = True
+            health["error"] = None
+            health["fetched_at"] = time.time()
+            return value
+        finally:
+            health["latency"] = time.monotonic() - start
+            self._inflight.pop((resource, site), None)
+
+    def _memo(self, resource, values, merge):
+        """Reutiliza la vista combinada si ninguna sede trajo un objeto nuevo."""
+        key = tuple((site, id(value)) for site, value in values.items())
+        cached = self._merged.get(resource)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        merged = merge(values)
+        # Se guardan los valores para que sus id() no se reutilicen
+        self._merged[resource] = (key, merged, values)
+        return merged
+
+    def merge_workers(self, values):
+        if not self.multi_site:
+            return next(iter(values.values()))
+        return self._memo(
+            "workers",
+            values,
+            lambda values: [
+                qualify(site, w) for site, workers in values.items() for w in workers
+            ],
+        )
+
+    def merge_tasks(self, values):
+        if not self.multi_site:
+            return next(iter(values.values()))
+        return self._memo("tasks", values, self._merge_tasks)
+
+    def _merge_tasks(self, values):
+        tasks, depths, sources = [], {}, []
+        truncated = False
+        for site, data in values.items():
+            tasks.extend(
+                dict(t, site=site, worker=qualify(site, t.get("worker", "")))
+                for t in data.get("queued_tasks", [])
+            )
+            for queue, depth in (data.get("queue_depths") or {}).items():
+                depths[qualify(site, queue)] = depth
+            if not data.get("queue_depths"):
+                depths[site] = len(data.get("queued_tasks", []))
+            truncated |= bool(data.get("truncated"))
+            sources.append(f"{site}:{data.get('source', 'gateway')}")
+        merged = {"queued_tasks": tasks, "source": " ".join(sources)}
+        if truncated:
+            merged.update(truncated=True, queue_depths=depths)
+        return merged
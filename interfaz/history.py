@@ -0,0 +1,111 @@
+"""Histórico de workers, profundidad de cola y estados de tareas.
+
+Los puntos crudos viven en un ring buffer en memoria; cada punto se agrega
+además en SQLite en buckets de 1 minuto y de 1 hora (suma, mínimo, máximo y
+número de muestras), que se podan por retención. Así semanas de histórico
+ocupan unos pocos MB y las consultas de las gráficas leen pocas filas.
+"""
+
+import os
+import sqlite3
+import time
+from collections import Counter, deque
+
+HISTORY_DB = os.getenv("HISTORY_DB", "history.sqlite")
+HISTORY_RAW_POINTS = int(os.getenv("HISTORY_RAW_POINTS", "720"))
+RETENTION_1M = float(os.getenv("HISTORY_RETENTION_1M_DAYS", "7")) * 86400
+RETENTION_1H = float(os.getenv("HISTORY_RETENTION_1H_DAYS", "90")) * 86400
+PRUNE_EVERY = 3600
+# Rango máximo servido con buckets de 1 minuto (~1440 puntos por serie)
+MAX_1M_RANGE = 86400
+
+RESOLUTIONS = {"rollup_1m": 60, "rollup_1h": 3600}
+
+
+def snapshot_metrics(snapshot):
+    """Convierte un snapshot del poller en ``{serie: valor}``.
+
+    Las fuentes que vienen stale no se registran para no repetir valores viejos.
+    """
+    values = {}
+    if "workers" not in snapshot["stale"]:
+        values["workers"] = len(snapshot["workers"])
+    if "tasks" not in snapshot["stale"]:
+        tasks = snapshot["tasks"].get("queued_tasks", [])
+        values["queue.total"] = len(tasks)
+        for priority, n in Counter(t.get("priority") or "none" for t in tasks).items():
+            values[f"queue.{priority}"] = n
+        for state, n in Counter(t.get("state") or "UNKNOWN" for t in tasks).items():
+            values[f"state.{state}"] = n
+    return values
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB, raw_points=HISTORY_RAW_POINTS):
+        self.raw = deque(maxlen=raw_points)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        for table in RESOLUTIONS:
+            self.db.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                    bucket INTEGER NOT NULL,
+                    series TEXT NOT NULL,
+                    total REAL NOT NULL,
+                    min REAL NOT NULL,
+                    max REAL NOT NULL,
+                    n INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, series)
+                ) WITHOUT ROWID""")
+        self.db.commit()
+        self._pruned_at = 0.0
+
+    def record(self, values, ts=None):
+        if not values:
+            return
+        ts = time.time() if ts is None else ts
+        self.raw.append((ts, values))
+        for table, step in RESOLUTIONS.items():
+            bucket = int(ts // step * step)
+            self.db.executemany(
+                f"""INSERT INTO {table} (bucket, series, total, min, max, n)
+                    VALUES (?, ?, ?, ?, ?, 1)
+                    ON CONFLICT (bucket, series) DO UPDATE SET
+                        total = total + excluded.total,
+                        min = MIN(min, excluded.min),
+                        max = MAX(max, excluded.max),
+                        n = n + 1""",
+                [(bucket, s, v, v, v) for s, v in values.items()],
+            )
+        self.db.commit()
+        if ts - self._pruned_at > PRUNE_EVERY:
+            self.prune(ts)
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        self.db.execute("DELETE FROM rollup_1m WHERE bucket < ?", (now - RETENTION_1M,))
+        self.db.execute("DELETE FROM rollup_1h WHERE bucket < ?", (now - RETENTION_1H,))
+        self.db.commit()
+        self._pruned_at = now
+
+    def query(self, seconds, prefixes=("",), now=None):
+        """Devuelve ``[(ts, serie, valor)]`` de los últimos ``seconds``.
+
+        Usa el ring buffer si cubre el rango, si no buckets de 1 minuto hasta
+        un día y de 1 hora para rangos mayores (valor medio por bucket).
+        """
+        prefixes = tuple(prefixes)
+        now = time.time() if now is None else now
+        since = now - seconds
+        if self.raw and self.raw[0][0] <= since:
+            return [
+                (ts, s, v)
+                for ts, values in self.raw
+                if ts >= since
+                for s, v in values.items()
+                if s.startswith(prefixes)
+            ]
+        table = "rollup_1m" if seconds <= MAX_1M_RANGE else "rollup_1h"
+        rows = self.db.execute(
+            f"""SELECT bucket, series, total / n FROM {table}
+                WHERE bucket >= ? ORDER BY bucket""",
+            (int(since),),
+        )
+        return [row for row in rows if row[1].startswith(prefixes)]
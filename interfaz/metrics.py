@@ -0,0 +1,140 @@
+"""Métricas Prometheus del dashboard y de las llamadas al gateway.
+
+Se exponen en ``http://<gui>:METRICS_PORT/metrics`` para que Prometheus las
+recoja desde la red ``train_service``. Permiten separar el tiempo que se va
+en Gradio (callbacks y espera en el event loop) del que se va en la red o en
+el gateway de NeuralForgeAI.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+LAG_INTERVAL = 0.5
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(2**i for i in range(8, 26, 2))
+
+UPSTREAM_LATENCY = Histogram(
+    "dashboard_upstream_request_seconds",
+    "Latency of gateway requests",
+    ["site", "endpoint", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "dashboard_upstream_errors_total",
+    "Failed gateway requests",
+    ["site", "endpoint", "method", "reason"],
+)
+UPSTREAM_PAYLOAD = Histogram(
+    "dashboard_upstream_response_bytes",
+    "Size of gateway response bodies",
+    ["site", "endpoint", "method"],
+    buckets=SIZE_BUCKETS,
+)
+UPSTREAM_NOT_MODIFIED = Counter(
+    "dashboard_upstream_not_modified_total",
+    "Conditional gateway requests answered with 304 Not Modified",
+    ["site", "endpoint", "method"],
+)
+CALLBACK_LATENCY = Histogram(
+    "dashboard_callback_seconds",
+    "Execution time of Gradio callbacks",
+    ["callback"],
+    buckets=LATENCY_BUCKETS,
+)
+CALLBACK_ERRORS = Counter(
+    "dashboard_callback_errors_total",
+    "Gradio callbacks that raised",
+    ["callback"],
+)
+LOOP_LAG = Histogram(
+    "dashboard_event_loop_lag_seconds",
+    "Delay before a ready coroutine gets to run (queue wait in the event loop)",
+    buckets=LATENCY_BUCKETS,
+)
+
+_lag_task = None
+
+
+def endpoint_label(method, path):
+    """Agrupa rutas con IDs para no crear una serie por tarea o estudio."""
+    parts = path.split("?")[0].strip("/").split("/")
+    if parts[0] == "tasks" and len(parts) == 3 and parts[2] == "requeue":
+        return "requeue"
+    if parts[0] == "tasks" and len(parts) == 2 and method == "DELETE":
+        return "delete"
+    return "/" + parts[0]
+
+
+def observe_upstream(method, path, elapsed, response=None, reason=None, site=""):
+    endpoint = endpoint_label(method, path)
+    UPSTREAM_LATENCY.labels(site, endpoint, method).observe(elapsed)
+    if response is not None:
+        UPSTREAM_PAYLOAD.labels(site, endpoint, method).observe(len(response.content))
+        if response.status_code >= 400:
+            reason = f"http_{response.status_code // 100}xx"
+    if reason:
+        UPSTREAM_ERRORS.labels(site, endpoint, method, reason).inc()
+
+
+def observe_not_modified(method, path, site=""):
+    UPSTREAM_NOT_MODIFIED.labels(site, endpoint_label(method, path), method).inc()
+
+
+async def _measure_loop_lag():
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(LAG_INTERVAL)
+        LOOP_LAG.observe(max(0.0, time.monotonic() - start - LAG_INTERVAL))
+
+
+def _ensure_lag_probe():
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.ensure_future(_measure_loop_lag())
+
+
+def instrument(fn):
+    """Mide duración y errores de un callback async o generador async."""
+    name = fn.__name__
+
+    if inspect.isasyncgenfunction(fn):
+
+        @functools.wraps(fn)
+        async def gen_wrapper(*args, **kwargs):
+            _ensure_lag_probe()
+            start = time.monotonic()
+            try:
+                async for item in fn(*args, **kwargs):
+                    yield item
+            except Exception:
+                CALLBACK_ERRORS.labels(name).inc()
+                raise
+            finally:
+                CALLBACK_LATENCY.labels(name).observe(time.monotonic() - start)
+
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        _ensure_lag_probe()
+        start = time.monotonic()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            CALLBACK_ERRORS.labels(name).inc()
+            raise
+        finally:
+            CALLBACK_LATENCY.labels(name).observe(time.monotonic() - start)
+
+    return wrapper
+
+
+def start_server(port=METRICS_PORT):
+    start_http_server(port)
@@ -0,0 +1,128 @@
+"""Poller en segundo plano con el estado del cluster compartido por todas las sesiones.
+
+Un único bucle dentro del proceso Gradio toma cada ``POLL_INTERVAL`` segundos
+un snapshot de workers, tareas encoladas y estado de los estudios conocidos.
+Las sesiones solo leen ese snapshot, así la carga sobre el gateway es
+constante sin importar cuántos dashboards haya abiertos.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "5"))
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterPoller:
+    def __init__(
+        self,
+        fetch_workers,
+        fetch_tasks,
+        fetch_status,
+        interval=POLL_INTERVAL,
+        on_snapshot=None,
+    ):
+        self.fetch_workers = fetch_workers
+        self.fetch_tasks = fetch_tasks
+        self.fetch_status = fetch_status
+        self.interval = interval
+        self.on_snapshot = on_snapshot
+        self.snapshot = {
+            "workers": [],
+            "tasks": {"queued_tasks": []},
+            "studies": {},
+            "updated_at": None,
+            "fetched_at": {"workers": None, "tasks": None},
+            "stale": [],
+            "healthy": False,
+            "error": None,
+        }
+        self.polls = 0
+        self._studies = {}
+        self._task = None
+        self._wake = None
+        self._ready = None
+
+    def ensure_started(self):
+        """Arranca el bucle en el event loop actual (el de Gradio) si no corre."""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def current(self):
+        """Devuelve el snapshot, esperando al primer sondeo si aún no existe."""
+        self.ensure_started()
+        await self._ready.wait()
+        return self.snapshot
+
+    def track_study(self, study_id, state="PENDING"):
+        if self._studies.get(study_id) not in TERMINAL_STATES:
+            self._studies[study_id] = state
+
+    def wake(self):
+        """Adelanta el siguiente sondeo, p. ej. tras encolar o revocar una tarea."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Un fallo inesperado (p. ej. en ``on_snapshot``) no puede matar el
+                # bucle: se registra y se reintenta en el siguiente intervalo
+                logger.exception("Cluster poll failed")
+            finally:
+                # Aunque el primer sondeo falle, ``current()`` no espera para siempre
+                self._ready.set()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def refresh(self):
+        pending = [
+            sid for sid, state in self._studies.items() if state not in TERMINAL_STATES
+        ]
+        results = await asyncio.gather(
+            self.fetch_workers(),
+            self.fetch_tasks(),
+            *[self.fetch_status(sid) for sid in pending],
+            return_exceptions=True,
+        )
+        workers, tasks, statuses = results[0], results[1], results[2:]
+        errors = [r for r in results if isinstance(r, Exception)]
+
+        # Si una fuente falla se conserva su último valor bueno y se marca stale
+        snapshot = dict(self.snapshot)
+        fetched_at = dict(snapshot["fetched_at"])
+        stale = []
+        for name, value in (("workers", workers), ("tasks", tasks)):
+            if isinstance(value, Exception):
+                stale.append(name)
+            else:
+                snapshot[name] = value
+                fetched_at[name] = time.time()
+        snapshot["fetched_at"] = fetched_at
+        snapshot["stale"] = stale
+        for sid, status in zip(pending, statuses):
+            if not isinstance(status, Exception):
+                self._studies[sid] = status.get("state", "UNKNOWN")
+        snapshot["studies"] = dict(self._studies)
+        if len(errors) < len(results):
+            snapshot["updated_at"] = time.time()
+        snapshot["healthy"] = not errors
+        snapshot["error"] = str(errors[0]) if errors else None
+
+        # Sustitución atómica: los lectores nunca ven un snapshot a medias
+        self.snapshot = snapshot
+        self.polls += 1
+        if self.on_snapshot is not None:
+            self.on_snapshot(snapshot)
+        return snapshot
@@ -0,0 +1,162 @@
+"""Lectura directa (solo lectura) de las colas Celery en Redis.
+
+Cuando ``REDIS_URL`` está definido, las vistas de cola se sirven desde el
+broker sin pasar por el gateway: SCAN para descubrir ``managers`` y
+``gpus_*`` (incluidas las sub-listas de prioridad de kombu), como mucho cada
+``REDIS_SCAN_INTERVAL`` segundos, y en cada sondeo un único pipeline con LLEN
+y el primer y último mensaje de cada cola. Kombu encola por la izquierda y
+consume por la derecha, así que si ninguno cambia las colas son las mismas y
+se devuelve el snapshot anterior (el mismo objeto, así el índice de tareas no
+se reconstruye). Solo entonces se leen los mensajes con LRANGE por lotes y se
+parsean en un hilo, fuera del event loop.
+Si Redis falla, el llamador vuelve a usar el gateway.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # modo opcional: sin la librería se usa solo el gateway
+    aioredis = None
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+QUEUE_PATTERNS = os.getenv("REDIS_QUEUE_PATTERNS", "managers*,gpus_*").split(",")
+REDIS_BATCH = int(os.getenv("REDIS_BATCH", "1000"))
+REDIS_MAX_TASKS = int(os.getenv("REDIS_MAX_TASKS", "200000"))
+REDIS_SCAN_INTERVAL = float(os.getenv("REDIS_SCAN_INTERVAL", "30"))
+# Separador que kombu usa para las listas de prioridad: "<cola>\x06\x16<prioridad>"
+PRIORITY_SEP = "\x06\x16"
+
+
+def split_queue(name):
+    """``"gpus_a\\x06\\x163"`` -> ``("gpus_a", "3")``; sin sufijo la prioridad es 0."""
+    base, _, priority = name.partition(PRIORITY_SEP)
+    return base, priority or "0"
+
+
+def parse_message(raw, queue):
+    """Convierte un mensaje Celery (protocolo 2) al formato de ``/tasks``."""
+    base, priority = split_queue(queue)
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError):
+        return {"task_id": "", "state": "INVALID", "worker": base, "args": ""}
+    headers = message.get("headers") or {}
+    properties = message.get("properties") or {}
+    args = headers.get("argsrepr")
+    if args is None and properties.get("body_encoding") == "base64":
+        try:
+            args = base64.b64decode(message.get("body", "")).decode("utf-8", "replace")
+        except (TypeError, ValueError):
+            args = ""
+    return {
+        "task_id": headers.get("id") or properties.get("correlation_id", ""),
+        "state": "PENDING",
+        "worker": base,
+        "priority": str(properties.get("priority", priority)),
+        "task": headers.get("task", ""),
+        "args": args or "",
+    }
+
+
+def parse_ranges(results):
+    """``[(cola, [mensaje_crudo, ...]), ...]`` -> lista de tareas."""
+    return [parse_message(m, name) for name, raw in results for m in raw]
+
+
+class RedisQueueReader:
+    def __init__(
+        self,
+        client,
+        patterns=QUEUE_PATTERNS,
+        batch=REDIS_BATCH,
+        scan_interval=REDIS_SCAN_INTERVAL,
+    ):
+        self.client = client
+        self.patterns = [p.strip() for p in patterns if p.strip()]
+        self.batch = batch
+        self.scan_interval = scan_interval
+        self._names = None
+        self._scanned_at = 0.0
+        # (firma de las colas, snapshot devuelto)
+        self._last = None
+
+    @classmethod
+    def from_url(cls, url=REDIS_URL, **kwargs):
+        if not url or aioredis is None:
+            return None
+        return cls(aioredis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    async def queue_names(self):
+        names = set()
+        for pattern in self.patterns:
+            async for key in self.client.scan_iter(match=pattern, count=1000):
+                names.add(key)
+        names = sorted(names)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.type(name)
+            types = await pipe.execute()
+        return [n for n, t in zip(names, types) if t == "list"]
+
+    async def known_queues(self):
+        """Colas del último SCAN, repitiéndolo cada ``scan_interval`` segundos."""
+        now = time.monotonic()
+        if self._names is None or now - self._scanned_at >= self.scan_interval:
+            self._names = await self.queue_names()
+            self._scanned_at = now
+        return self._names
+
+    async def depths(self, names=None):
+        """``{cola: longitud}`` con un solo round trip para todos los LLEN."""
+        depths, _ = await self.queue_state(names)
+        return depths
+
+    async def queue_state(self, names=None):
+        """``({cola: longitud}, firma)``; la firma cambia si cambia alguna cola."""
+        names = await self.known_queues() if names is None else names
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.llen(name)
+                pipe.lindex(name, 0)
+                pipe.lindex(name, -1)
+            replies = await pipe.execute()
+        lengths = replies[0::3]
+        signature = tuple(zip(names, lengths, replies[1::3], replies[2::3]))
+        return dict(zip(names, lengths)), signature
+
+    async def queued_tasks(self, limit=REDIS_MAX_TASKS):
+        """Snapshot compatible con ``GET /tasks`` leído directamente del broker."""
+        depths, signature = await self.queue_state()
+        signature = (limit, signature)
+        if self._last is not None and self._last[0] == signature:
+            return self._last[1]
+        ranges = []
+        remaining = limit
+        for name, length in depths.items():
+            take = min(length, remaining)
+            for start in range(0, take, self.batch):
+                ranges.append((name, start, min(start + self.batch, take) - 1))
+            remaining -= take
+        results = []
+        # Varias LRANGE por pipeline para no hacer un round trip por lote
+        for i in range(0, len(ranges), 16):
+            chunk = ranges[i : i + 16]
+            async with self.client.pipeline(transaction=False) as pipe:
+                for name, start, end in chunk:
+                    pipe.lrange(name, start, end)
+                raw = await pipe.execute()
+            results.extend((name, r) for (name, _, _), r in zip(chunk, raw))
+        tasks = await asyncio.to_thread(parse_ranges, results)
+        snapshot = {
+            "queued_tasks": tasks,
+            "queue_depths": depths,
+            "truncated": sum(depths.values()) > len(tasks),
+            "source": "redis",
+        }
+        self._last = (signature, snapshot)
+        return snapshot
@@ -0,0 +1,84 @@
+"""Estado de estudios: caché permanente de estados terminales y modo watch.
+
+Un estudio en SUCCESS/FAILURE/REVOKED ya no cambia, así que su payload se
+guarda y no se vuelve a pedir. El watcher consulta cada estudio con backoff
+adaptativo: vuelve al intervalo mínimo cuando el estado cambia y lo duplica
+(hasta el máximo) mientras sigue igual.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from poller import TERMINAL_STATES
+
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", "1"))
+WATCH_MAX_INTERVAL = float(os.getenv("WATCH_MAX_INTERVAL", "30"))
+STUDY_CACHE_SIZE = int(os.getenv("STUDY_CACHE_SIZE", "1000"))
+
+
+class StudyStatusStore:
+    def __init__(self, fetch, max_size=STUDY_CACHE_SIZE):
+        self.fetch = fetch
+        self.max_size = max_size
+        self._terminal = OrderedDict()
+
+    async def get(self, study_id):
+        if study_id in self._terminal:
+            self._terminal.move_to_end(study_id)
+            return self._terminal[study_id]
+        data = await self.fetch(study_id)
+        if data.get("state") in TERMINAL_STATES:
+            self._terminal[study_id] = data
+            if len(self._terminal) > self.max_size:
+                self._terminal.popitem(last=False)
+        return data
+
+
+async def watch(
+    study_ids,
+    get_status,
+    min_interval=WATCH_MIN_INTERVAL,
+    max_interval=WATCH_MAX_INTERVAL,
+):
+    """Produce ``{study_id: [(hora, estado), ...]}`` cada vez que algún estado cambia.
+
+    Termina cuando todos los estudios han llegado a un estado terminal.
+    """
+    history = {sid: [] for sid in study_ids}
+    interval = dict.fromkeys(study_ids, min_interval)
+    due = dict.fromkeys(study_ids, 0.0)
+    while True:
+        now = time.monotonic()
+        ready = [
+            sid
+            for sid in study_ids
+            if due[sid] <= now
+            and not (history[sid] and history[sid][-1][1] in TERMINAL_STATES)
+        ]
+        results = await asyncio.gather(
+            *[get_status(sid) for sid in ready], return_exceptions=True
+        )
+        changed = False
+        for sid, data in zip(ready, results):
+            state = "ERROR" if isinstance(data, Exception) else data.get("state")
+            state = state or "UNKNOWN"
+            if not history[sid] or history[sid][-1][1] != state:
+                history[sid].append((time.time(), state))
+                interval[sid] = min_interval
+                changed = True
+            else:
+                interval[sid] = min(interval[sid] * 2, max_interval)
+            due[sid] = time.monotonic() + interval[sid]
+        if changed:
+            yield history
+
+        pending = [
+            sid for sid in study_ids if history[sid][-1][1] not in TERMINAL_STATES
+        ]
+        if not pending:
+            return
+        await asyncio.sleep(
+            max(0.0, min(due[sid] for sid in pending) - time.monotonic())
+        )
@@ -0,0 +1,86 @@
+"""Índice en memoria sobre las tareas encoladas del snapshot.
+
+Se construye una vez por snapshot y permite paginar, ordenar y filtrar
+(estado, worker, prioridad y subcadena de args) sin recorrer ni serializar la
+lista completa en cada cambio de página.
+"""
+
+SORT_KEYS = ["task_id", "state", "worker", "priority", "args"]
+FILTER_KEYS = ["state", "worker", "priority"]
+ALL = "All"
+
+
+class TaskIndex:
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self._args = [str(t.get("args", "")).lower() for t in tasks]
+        # valor -> lista de posiciones (en orden original) para cada filtro exacto
+        self._postings = {key: {} for key in FILTER_KEYS}
+        for i, t in enumerate(tasks):
+            for key in FILTER_KEYS:
+                self._postings[key].setdefault(str(t.get(key, "")), []).append(i)
+        # Orden y rango por clave, calculados la primera vez que se ordena por ella
+        self._order = {}
+        self._rank = {}
+
+    def _sorted(self, key):
+        if key not in self._order:
+            tasks = self.tasks
+            order = sorted(range(len(tasks)), key=lambda i: str(tasks[i].get(key, "")))
+            rank = [0] * len(tasks)
+            for r, i in enumerate(order):
+                rank[i] = r
+            self._order[key] = order
+            self._rank[key] = rank
+        return self._order[key], self._rank[key]
+
+    def values(self, key):
+        return sorted(v for v in self._postings[key] if v)
+
+    def query(
+        self,
+        filters=None,
+        text="",
+        sort_key="task_id",
+        descending=False,
+        page=1,
+        page_size=50,
+    ):
+        """Devuelve ``(tareas_de_la_página, total_filtrado, página)``.
+
+        La página se acota al rango válido para el total filtrado.
+        """
+        sort_key = sort_key if sort_key in SORT_KEYS else "task_id"
+        order, rank = self._sorted(sort_key)
+        active = {k: v for k, v in (filters or {}).items() if v and v != ALL}
+        text = (text or "").strip().lower()
+
+        if not active and not text:
+            candidates = order
+            if descending:
+                candidates = candidates[::-1]
+        else:
+            if active:
+                # Se parte de la lista de postings más corta y se filtra el resto
+                lists = [self._postings[k].get(str(v), []) for k, v in active.items()]
+                lists.sort(key=len)
+                candidates = lists[0]
+                for other in lists[1:]:
+                    keep = set(other)
+                    candidates = [i for i in candidates if i in keep]
+            else:
+                candidates = range(len(self.tasks))
+            if text:
+                args = self._args
+                candidates = [i for i in candidates if text in args[i]]
+            candidates = sorted(candidates, key=rank.__getitem__, reverse=descending)
+
+        total = len(candidates)
+        pages = max(1, -(-total // page_size))
+        page = min(max(int(page or 1), 1), pages)
+        start = (page - 1) * page_size
+        return (
+            [self.tasks[i] for i in candidates[start : start + page_size]],
+            total,
+            page,
+        )
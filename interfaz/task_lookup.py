@@ -0,0 +1,160 @@
+"""Búsqueda instantánea de tareas por prefijo de ID y por subcadena de args.
+
+Los IDs viven en una lista ordenada (bisect: prefijo en O(log n + k)) y los
+args en un índice de trigramas con listas de slots por trigrama. Entre
+snapshots solo se aplica la diferencia: las tareas nuevas se insertan, las que
+desaparecen se marcan como muertas y el índice se compacta cuando los slots
+muertos superan a los vivos.
+
+``update`` puede correr en un hilo mientras se consulta: las reconstrucciones
+sustituyen las estructuras de golpe y los cambios incrementales solo añaden al
+final o marcan slots como muertos, así que un lector ve el estado anterior o
+el nuevo, nunca uno roto.
+"""
+
+import bisect
+import os
+
+NGRAM = 3
+SUGGEST_LIMIT = int(os.getenv("TASK_SUGGEST_LIMIT", "20"))
+# Con más cambios que esto se reordena la lista de IDs en vez de insertar uno a uno
+RESORT_THRESHOLD = 1000
+
+
+def ngrams(text):
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def clean_id(text):
+    """Quita el "..." que añade la tabla al truncar los IDs."""
+    return (text or "").strip().rstrip(".…")
+
+
+class TaskLookup:
+    def __init__(self):
+        self.source = None
+        self._tasks = {}
+        self._ids = []
+        self._slots = {}
+        # (slot -> task_id, slot -> args en minúsculas, trigrama -> [slots])
+        self._index = ([], [], {})
+        self._dead = 0
+
+    def update(self, tasks):
+        """Sincroniza con la lista del snapshot aplicando solo la diferencia."""
+        if tasks is self.source:
+            return
+        current = {t["task_id"]: t for t in tasks if t.get("task_id")}
+        removed = [tid for tid in self._tasks if tid not in current]
+        added = [tid for tid in current if tid not in self._tasks]
+        self._tasks = current
+        self.source = tasks
+
+        slot_ids, slot_args, _ = self._index
+        for tid in removed:
+            slot = self._slots.pop(tid)
+            slot_args[slot] = None
+            slot_ids[slot] = None
+            self._dead += 1
+        if self._dead > max(RESORT_THRESHOLD, len(self._slots)):
+            self._rebuild_grams()
+        else:
+            for tid in added:
+                self._add_slot(self._index, tid)
+
+        if len(added) + len(removed) > RESORT_THRESHOLD:
+            self._ids = sorted(current)
+        else:
+            ids = list(self._ids)
+            for tid in removed:
+                del ids[bisect.bisect_left(ids, tid)]
+            for tid in added:
+                bisect.insort(ids, tid)
+            self._ids = ids
+
+    def _add_slot(self, index, tid):
+        slot_ids, slot_args, grams = index
+        slot = len(slot_ids)
+        args = str(self._tasks[tid].get("args", "")).lower()
+        self._slots[tid] = slot
+        slot_ids.append(tid)
+        slot_args.append(args)
+        # Las postings se tocan al final: un lector solo ve slots ya completos
+        for gram in ngrams(args):
+            postings = grams.get(gram)
+            if postings is None:
+                grams[gram] = [slot]
+            else:
+                postings.append(slot)
+
+    def _rebuild_grams(self):
+        index = ([], [], {})
+        self._slots = {}
+        self._dead = 0
+        for tid in self._tasks:
+            self._add_slot(index, tid)
+        self._index = index
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def count_prefix(self, prefix):
+        lo = bisect.bisect_left(self._ids, prefix)
+        hi = bisect.bisect_left(self._ids, prefix + "\U0010ffff")
+        return hi - lo
+
+    def by_prefix(self, prefix, limit=SUGGEST_LIMIT):
+        ids = self._ids
+        i = bisect.bisect_left(ids, prefix)
+        out = []
+        while i < len(ids) and len(out) < limit and ids[i].startswith(prefix):
+            out.append(ids[i])
+            i += 1
+        return out
+
+    def by_args(self, text, limit=SUGGEST_LIMIT):
+        slot_ids, slot_args, grams = self._index
+        text = text.lower()
+        if len(text) < NGRAM:
+            candidates = range(len(slot_args))
+        else:
+            # Se recorre la posting del trigrama más raro y se verifica cada slot
+            postings = [grams.get(g) for g in ngrams(text)]
+            if not all(postings):
+                return []
+            candidates = min(postings, key=len)
+        out = []
+        for slot in candidates:
+            args = slot_args[slot]
+            tid = slot_ids[slot]
+            if args is not None and tid is not None and text in args:
+                out.append(tid)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def suggest(self, text, limit=SUGGEST_LIMIT):
+        """IDs que empiezan por ``text`` y, después, tareas cuyos args lo contienen."""
+        text = clean_id(text)
+        if not text:
+            return []
+        out = self.by_prefix(text, limit)
+        if len(out) < limit:
+            seen = set(out)
+            out += [tid for tid in self.by_args(text, limit) if tid not in seen][
+                : limit - len(out)
+            ]
+        return out
+
+    def resolve(self, text):
+        """Devuelve ``(id_completo, coincidencias)`` para un ID o prefijo.
+
+        ``id_completo`` es None si el prefijo es ambiguo o no está en el snapshot.
+        """
+        text = clean_id(text)
+        if text in self._tasks:
+            return text, 1
+        n = self.count_prefix(text) if text else 0
+        if n == 1:
+            return self.by_prefix(text, 1)[0], 1
+        return None, n
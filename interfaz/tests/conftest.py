@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del dashboard se importan planos, como en app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import pytest
+
+import api_client
+from api_client import CircuitBreaker, CircuitOpenError, Gateway
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(api_client.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # Si la sonda se pierde, pasa otra tras reset_timeout
+    clock.now += 10
+    breaker.before_call()
+
+
+def test_probe_result_closes_or_reopens(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def mock_gateway(handler):
+    gateway = Gateway("test", "http://gateway")
+    gateway._client = httpx.AsyncClient(
+        base_url="http://gateway", transport=httpx.MockTransport(handler)
+    )
+    return gateway
+
+
+def test_gateway_5xx_and_transport_errors_trip_the_breaker():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(503)
+
+    async def run():
+        gateway = mock_gateway(handler)
+        gateway.breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        r = await gateway.get("/busy")
+        assert r.status_code == 503
+        with pytest.raises(httpx.ConnectError):
+            await gateway.get("/down")
+        # Abierto: falla rápido sin llamar al gateway
+        with pytest.raises(CircuitOpenError):
+            await gateway.get("/busy")
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert calls == ["/busy", "/down"]
+
+
+def test_hedged_get_returns_the_first_good_response(monkeypatch):
+    monkeypatch.setattr(api_client, "HEDGE_DELAY", 0.01)
+    attempts = []
+
+    async def handler(request):
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            # La primera copia se cuelga: la segunda (hedge) gana
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={"attempt": len(attempts)})
+
+    async def run():
+        gateway = mock_gateway(handler)
+        r = await gateway.get("/workers", hedge=True, deadline=2)
+        await gateway.aclose()
+        return r
+
+    r = asyncio.run(run())
+    assert r.json() == {"attempt": 2}
+    assert len(attempts) == 2
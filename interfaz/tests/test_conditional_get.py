@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from api_client import Gateway
+
+
+def serve(handler):
+    gateway = Gateway("test", "http://gateway")
+    gateway._client = httpx.AsyncClient(
+        base_url="http://gateway", transport=httpx.MockTransport(handler)
+    )
+    return gateway
+
+
+def test_304_returns_the_same_parsed_object():
+    seen_headers = []
+    body = {"queued_tasks": [{"task_id": "a"}]}
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=body, headers={"ETag": '"v1"'})
+
+    async def run():
+        gateway = serve(handler)
+        first = await gateway.get_json("/tasks", hedge=False)
+        second = await gateway.get_json("/tasks", hedge=False)
+        await gateway.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == body
+    # Mismo objeto: los llamadores detectan "sin cambios" por identidad
+    assert second is first
+    assert seen_headers == [None, '"v1"']
+
+
+def test_changed_resource_is_parsed_again():
+    version = {"n": 1}
+
+    def handler(request):
+        etag = f'"v{version["n"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=version["n"], headers={"ETag": etag})
+
+    async def run():
+        gateway = serve(handler)
+        first = await gateway.get_json("/workers", hedge=False)
+        version["n"] = 2
+        second = await gateway.get_json("/workers", hedge=False)
+        await gateway.aclose()
+        return first, second
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_responses_without_validators_are_not_remembered():
+    def handler(request):
+        assert "If-None-Match" not in request.headers
+        assert "If-Modified-Since" not in request.headers
+        return httpx.Response(200, json=[1, 2])
+
+    async def run():
+        gateway = serve(handler)
+        results = [await gateway.get_json("/workers", hedge=False) for _ in range(2)]
+        await gateway.aclose()
+        return results
+
+    first, second = asyncio.run(run())
+    assert first == second == [1, 2]
+    assert first is not second
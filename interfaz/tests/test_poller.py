@@ -0,0 +1,81 @@
+import asyncio
+
+from poller import ClusterPoller
+
+
+def test_failed_source_keeps_last_good_value_and_is_marked_stale():
+    workers = [[{"name": "w1"}], RuntimeError("gateway down")]
+
+    async def fetch_workers():
+        value = workers.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def fetch_tasks():
+        return {"queued_tasks": []}
+
+    async def fetch_status(study_id):
+        return {"state": "SUCCESS"}
+
+    async def run():
+        poller = ClusterPoller(fetch_workers, fetch_tasks, fetch_status)
+        poller.track_study("s1")
+        first = await poller.refresh()
+        second = await poller.refresh()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["healthy"] and first["stale"] == []
+    assert first["studies"] == {"s1": "SUCCESS"}
+    assert second["workers"] == [{"name": "w1"}]
+    assert second["stale"] == ["workers"]
+    assert not second["healthy"]
+    assert "gateway down" in second["error"]
+
+
+def test_loop_survives_exceptions_and_unblocks_current():
+    polls = []
+
+    async def fetch():
+        return []
+
+    async def fetch_tasks():
+        return {"queued_tasks": []}
+
+    def on_snapshot(snapshot):
+        polls.append(snapshot)
+        if len(polls) == 1:
+            raise RuntimeError("hook failed")
+
+    async def run():
+        poller = ClusterPoller(
+            fetch, fetch_tasks, fetch, interval=0.01, on_snapshot=on_snapshot
+        )
+        # Aunque el primer sondeo falle, current() responde
+        await asyncio.wait_for(poller.current(), 1)
+        await asyncio.sleep(0.1)
+        poller._task.cancel()
+
+    asyncio.run(run())
+    assert len(polls) > 1
+
+
+def test_wake_triggers_an_early_poll():
+    async def fetch():
+        return []
+
+    async def fetch_tasks():
+        return {"queued_tasks": []}
+
+    async def run():
+        poller = ClusterPoller(fetch, fetch_tasks, fetch, interval=60)
+        await poller.current()
+        before = poller.polls
+        poller.wake()
+        await asyncio.sleep(0.05)
+        poller._task.cancel()
+        return before, poller.polls
+
+    before, after = asyncio.run(run())
+    assert after == before + 1
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis_queues import PRIORITY_SEP, RedisQueueReader
+
+
+def message(task_id, args="(1,)", priority=None):
+    properties = {"correlation_id": task_id}
+    if priority is not None:
+        properties["priority"] = priority
+    return json.dumps(
+        {
+            "headers": {"id": task_id, "task": "train", "argsrepr": args},
+            "properties": properties,
+        }
+    )
+
+
+def make_reader():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return client, RedisQueueReader(client, patterns=["gpus_*", "managers*"])
+
+
+def test_reads_queues_and_priority_sublists():
+    async def run():
+        client, reader = make_reader()
+        await client.lpush("gpus_a", message("t1"), message("t2"))
+        await client.lpush(f"gpus_a{PRIORITY_SEP}3", message("t3"))
+        await client.set("gpus_not_a_list", "x")
+        return await reader.queued_tasks()
+
+    snapshot = asyncio.run(run())
+    assert snapshot["source"] == "redis"
+    assert snapshot["queue_depths"] == {"gpus_a": 2, f"gpus_a{PRIORITY_SEP}3": 1}
+    assert not snapshot["truncated"]
+    by_id = {t["task_id"]: t for t in snapshot["queued_tasks"]}
+    assert set(by_id) == {"t1", "t2", "t3"}
+    assert by_id["t3"]["worker"] == "gpus_a"
+    assert by_id["t3"]["priority"] == "3"
+    assert by_id["t1"]["args"] == "(1,)"
+
+
+def test_unchanged_queues_return_the_same_snapshot():
+    async def run():
+        client, reader = make_reader()
+        await client.lpush("gpus_a", message("t1"), message("t2"))
+        first = await reader.queued_tasks()
+        second = await reader.queued_tasks()
+        # Un push y un pop dejan la misma longitud, pero otros extremos
+        await client.lpush("gpus_a", message("t3"))
+        await client.rpop("gpus_a")
+        third = await reader.queued_tasks()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert second is first
+    assert third is not first
+    assert {t["task_id"] for t in third["queued_tasks"]} == {"t2", "t3"}
+
+
+def test_limit_truncates():
+    async def run():
+        client, reader = make_reader()
+        await client.lpush("gpus_a", *[message(f"t{i}") for i in range(10)])
+        return await reader.queued_tasks(limit=4)
+
+    snapshot = asyncio.run(run())
+    assert len(snapshot["queued_tasks"]) == 4
+    assert snapshot["truncated"]
+
+
+def test_invalid_message_is_reported():
+    async def run():
+        client, reader = make_reader()
+        await client.lpush("managers", "not json")
+        return await reader.queued_tasks()
+
+    (task,) = asyncio.run(run())["queued_tasks"]
+    assert task["state"] == "INVALID"
+    assert task["worker"] == "managers"
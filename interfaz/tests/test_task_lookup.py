@@ -0,0 +1,81 @@
+import random
+
+import task_lookup
+from task_lookup import TaskLookup
+
+
+def make_tasks(ids):
+    return [{"task_id": tid, "args": f"config_{tid[-3:]}.yaml"} for tid in ids]
+
+
+def brute_prefix(tasks, prefix):
+    return sorted(t["task_id"] for t in tasks if t["task_id"].startswith(prefix))
+
+
+def brute_args(tasks, text):
+    return sorted(t["task_id"] for t in tasks if text.lower() in t["args"].lower())
+
+
+def check(lookup, tasks):
+    for prefix in ("a", "ab", "b1", "c", "zz"):
+        assert lookup.by_prefix(prefix, limit=10**6) == brute_prefix(tasks, prefix)
+        assert lookup.count_prefix(prefix) == len(brute_prefix(tasks, prefix))
+    for text in ("fig_1", "CONFIG", "yaml", "_9", "nope"):
+        assert sorted(lookup.by_args(text, limit=10**6)) == brute_args(tasks, text)
+
+
+def test_update_applies_added_and_removed_tasks():
+    lookup = TaskLookup()
+    first = make_tasks(["abc001", "abd002", "b10003"])
+    lookup.update(first)
+    check(lookup, first)
+
+    second = make_tasks(["abd002", "b10003", "c00004"])
+    lookup.update(second)
+    check(lookup, second)
+    assert lookup.get("abc001") is None
+    assert lookup.get("c00004")["args"] == "config_004.yaml"
+
+
+def test_same_list_object_is_a_no_op():
+    lookup = TaskLookup()
+    tasks = make_tasks(["abc001"])
+    lookup.update(tasks)
+    tasks.append({"task_id": "abc002", "args": ""})
+    # La misma lista (p. ej. 304 del gateway) no se vuelve a leer
+    lookup.update(tasks)
+    assert lookup.get("abc002") is None
+
+
+def test_random_churn_matches_brute_force(monkeypatch):
+    # Umbral bajo para pasar también por la compactación y el reordenado
+    monkeypatch.setattr(task_lookup, "RESORT_THRESHOLD", 5)
+    rng = random.Random(0)
+    pool = sorted(
+        {f"{rng.choice('abc')}{rng.randrange(16**5):05x}" for _ in range(300)}
+    )
+    lookup = TaskLookup()
+    for _ in range(30):
+        tasks = make_tasks(rng.sample(pool, rng.randrange(0, 120)))
+        lookup.update(tasks)
+        check(lookup, tasks)
+
+
+def test_resolve_prefix_and_truncated_ids():
+    lookup = TaskLookup()
+    lookup.update(make_tasks(["abc001", "abd002"]))
+    assert lookup.resolve("abc001") == ("abc001", 1)
+    assert lookup.resolve("abc...") == ("abc001", 1)
+    assert lookup.resolve("ab") == (None, 2)
+    assert lookup.resolve("zz") == (None, 0)
+
+
+def test_suggest_lists_prefix_matches_before_args_matches():
+    lookup = TaskLookup()
+    lookup.update(
+        [
+            {"task_id": "yaml01", "args": "x"},
+            {"task_id": "abc002", "args": "run.yaml"},
+        ]
+    )
+    assert lookup.suggest("yaml") == ["yaml01", "abc002"]